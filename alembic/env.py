@@ -51,14 +51,14 @@ def do_run_migrations(connection: Connection) -> None:
         context.run_migrations()
 
 
-async def run_async_migrations() -> None:
+async def run_async_migrations(url: str) -> None:
     """In this scenario we need to create an Engine
     and associate a connection with the context.
 
     """
 
     configuration = config.get_section(config.config_ini_section, {})
-    configuration["sqlalchemy.url"] = settings.ASYNC_SQLITE_ALCHEMY_URI
+    configuration["sqlalchemy.url"] = url
     connectable = async_engine_from_config(
         configuration,
         prefix="sqlalchemy.",
@@ -72,9 +72,10 @@ async def run_async_migrations() -> None:
 
 
 def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
+    """Run migrations in 'online' mode, once per shard database."""
 
-    asyncio.run(run_async_migrations())
+    for url in settings.ASYNC_SQLITE_SHARD_URIS:
+        asyncio.run(run_async_migrations(url))
 
 
 if context.is_offline_mode():
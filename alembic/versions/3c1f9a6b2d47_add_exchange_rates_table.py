@@ -0,0 +1,33 @@
+"""Add exchange_rates table
+
+Revision ID: 3c1f9a6b2d47
+Revises: 816d6af3a400
+Create Date: 2026-10-18 10:12:31.104519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a6b2d47'
+down_revision: Union[str, None] = '816d6af3a400'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('exchange_rates',
+    sa.Column('pair', sa.String(length=16), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('rate', sa.Numeric(precision=10, scale=4), nullable=False),
+    sa.PrimaryKeyConstraint('pair', 'date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('exchange_rates')
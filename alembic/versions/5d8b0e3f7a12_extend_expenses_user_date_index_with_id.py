@@ -0,0 +1,30 @@
+"""Extend expenses user/date index with id for keyset pagination
+
+Revision ID: 5d8b0e3f7a12
+Revises: a7e2c94d1b58
+Create Date: 2026-10-18 12:40:17.392650
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8b0e3f7a12'
+down_revision: Union[str, None] = 'a7e2c94d1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_expenses_telegram_user_id_expense_date_id', 'expenses', ['telegram_user_id', 'expense_date', 'id'], unique=False)
+    op.drop_index('ix_expenses_telegram_user_id_expense_date', table_name='expenses')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_expenses_telegram_user_id_expense_date', 'expenses', ['telegram_user_id', 'expense_date'], unique=False)
+    op.drop_index('ix_expenses_telegram_user_id_expense_date_id', table_name='expenses')
@@ -0,0 +1,117 @@
+"""Store expense ids as 16-byte UUIDs and amounts as integer cents
+
+Revision ID: 9b4f2c7d1e63
+Revises: 5d8b0e3f7a12
+Create Date: 2026-10-18 15:02:41.118203
+
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Callable, Sequence, Union
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f2c7d1e63'
+down_revision: Union[str, None] = '5d8b0e3f7a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_expenses_telegram_user_id_expense_date_id'
+CHUNK_SIZE = 10000
+
+
+def uuid_to_bytes(value: str) -> Union[bytes, str]:
+    """Pack canonical UUIDs; keep any other id as text, like the UUIDBytes type."""
+    try:
+        uuid = UUID(value)
+    except ValueError:
+        return value
+    return uuid.bytes if str(uuid) == value else value
+
+
+def bytes_to_uuid(value: Union[bytes, str]) -> str:
+    if isinstance(value, str):
+        return value
+    return str(UUID(bytes=value)) if len(value) == 16 else value.decode()
+
+
+def to_cents(value) -> int:
+    return int(Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_cents(value) -> Decimal:
+    return Decimal(int(value)).scaleb(-2)
+
+
+def copy_expenses(source: str, target: str, description_from: str, description_to: str, convert_id: Callable, convert_amount: Callable) -> None:
+    """Copy rows in rowid-ordered chunks, converting ids and amounts in Python."""
+    connection = op.get_bind()
+    last_rowid = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                f'SELECT rowid, id, telegram_user_id, amount_in_uah, amount_in_usd, "{description_from}" AS description, expense_date '
+                f'FROM {source} WHERE rowid > :last_rowid ORDER BY rowid LIMIT :limit'
+            ),
+            {'last_rowid': last_rowid, 'limit': CHUNK_SIZE},
+        ).all()
+        if not rows:
+            return
+
+        connection.execute(
+            sa.text(
+                f'INSERT INTO {target} (id, telegram_user_id, amount_in_uah, amount_in_usd, "{description_to}", expense_date) '
+                'VALUES (:id, :telegram_user_id, :amount_in_uah, :amount_in_usd, :description, :expense_date)'
+            ),
+            [
+                {
+                    'id': convert_id(row.id),
+                    'telegram_user_id': row.telegram_user_id,
+                    'amount_in_uah': convert_amount(row.amount_in_uah),
+                    'amount_in_usd': convert_amount(row.amount_in_usd),
+                    'description': row.description,
+                    'expense_date': row.expense_date,
+                }
+                for row in rows
+            ],
+        )
+        last_rowid = rows[-1].rowid
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('expenses_compact',
+    sa.Column('id', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('telegram_user_id', sa.String(length=255), nullable=False),
+    sa.Column('amount_in_uah', sa.Integer(), nullable=False),
+    sa.Column('amount_in_usd', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('expense_date', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    copy_expenses('expenses', 'expenses_compact', '255', 'description', uuid_to_bytes, to_cents)
+    op.drop_index(INDEX_NAME, table_name='expenses')
+    op.drop_table('expenses')
+    op.rename_table('expenses_compact', 'expenses')
+    op.create_index(INDEX_NAME, 'expenses', ['telegram_user_id', 'expense_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('expenses_legacy',
+    sa.Column('id', sa.String(length=255), nullable=False),
+    sa.Column('telegram_user_id', sa.String(length=255), nullable=False),
+    sa.Column('amount_in_uah', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('amount_in_usd', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('255', sa.String(), nullable=False),
+    sa.Column('expense_date', sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    copy_expenses('expenses', 'expenses_legacy', 'description', '255', bytes_to_uuid, lambda value: float(from_cents(value)))
+    op.drop_index(INDEX_NAME, table_name='expenses')
+    op.drop_table('expenses')
+    op.rename_table('expenses_legacy', 'expenses')
+    op.create_index(INDEX_NAME, 'expenses', ['telegram_user_id', 'expense_date', 'id'], unique=False)
@@ -0,0 +1,28 @@
+"""Add (telegram_user_id, expense_date) index on expenses
+
+Revision ID: a7e2c94d1b58
+Revises: 3c1f9a6b2d47
+Create Date: 2026-10-18 11:03:54.671202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e2c94d1b58'
+down_revision: Union[str, None] = '3c1f9a6b2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_expenses_telegram_user_id_expense_date', 'expenses', ['telegram_user_id', 'expense_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_expenses_telegram_user_id_expense_date', table_name='expenses')
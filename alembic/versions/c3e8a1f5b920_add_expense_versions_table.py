@@ -0,0 +1,32 @@
+"""Add expense_versions table
+
+Revision ID: c3e8a1f5b920
+Revises: 9b4f2c7d1e63
+Create Date: 2026-10-18 17:21:09.604113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f5b920'
+down_revision: Union[str, None] = '9b4f2c7d1e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('expense_versions',
+    sa.Column('telegram_user_id', sa.String(length=255), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('telegram_user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('expense_versions')
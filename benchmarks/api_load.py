@@ -0,0 +1,383 @@
+"""Load-test the expenses API in process: seed a synthetic dataset into a
+temporary SQLite database, then drive each endpoint through an ASGI transport
+and report latency percentiles and throughput.
+
+Endpoints run one after another, reads before writes, each with its own
+request budget. Results can be saved as JSON and compared with a previous run.
+
+Usage:
+    python -m benchmarks.api_load [--users 100] [--expenses-per-user 200]
+        [--requests 2000] [--concurrency 32] [--shards 1]
+        [--endpoints list summary ...] [--output run.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+
+STUB_RATE = 40.0
+INSERT_CHUNK = 10000
+PAGE_LIMIT = 100
+
+
+class Call(NamedTuple):
+    user: str
+    method: str
+    url: str
+    params: Optional[Dict] = None
+    json: Optional[Dict] = None
+    headers: Optional[Dict] = None
+
+
+class Dataset:
+    def __init__(self, expenses: List[Tuple[str, str]]) -> None:
+        # (telegram_user_id, expense id) of every seeded expense
+        self.expenses = expenses
+        self.users = sorted({user for user, _ in expenses})
+        self.deletable = expenses.copy()
+        random.Random(1).shuffle(self.deletable)
+        # Last ETag seen per user, for conditional requests
+        self.etags: Dict[str, str] = {}
+
+
+def list_call(dataset: Dataset, rng: random.Random) -> Call:
+    user = rng.choice(dataset.users)
+    return Call(
+        user,
+        "GET",
+        "/expenses",
+        params={"expense_telegram_user_id": user, "limit": PAGE_LIMIT},
+    )
+
+
+def list_cached_call(dataset: Dataset, rng: random.Random) -> Call:
+    call = list_call(dataset, rng)
+    etag = dataset.etags.get(call.user)
+    return call._replace(headers={"If-None-Match": etag} if etag else None)
+
+
+def list_range_call(dataset: Dataset, rng: random.Random) -> Call:
+    user = rng.choice(dataset.users)
+    return Call(
+        user,
+        "GET",
+        "/expenses",
+        params={
+            "expense_telegram_user_id": user,
+            "limit": PAGE_LIMIT,
+            "start_date": "2024-03-01",
+            "end_date": "2024-05-31",
+            "order": "desc",
+        },
+    )
+
+
+def summary_call(dataset: Dataset, rng: random.Random) -> Call:
+    user = rng.choice(dataset.users)
+    return Call(
+        user,
+        "GET",
+        "/expenses/summary",
+        params={"expense_telegram_user_id": user, "group_by": "week"},
+    )
+
+
+def export_call(dataset: Dataset, rng: random.Random) -> Call:
+    user = rng.choice(dataset.users)
+    return Call(
+        user, "GET", "/expenses/export", params={"expense_telegram_user_id": user}
+    )
+
+
+def get_call(dataset: Dataset, rng: random.Random) -> Call:
+    user, expense_id = rng.choice(dataset.expenses)
+    return Call(
+        user, "GET", f"/expense/{expense_id}", params={"telegram_user_id": user}
+    )
+
+
+def create_call(dataset: Dataset, rng: random.Random) -> Call:
+    user = rng.choice(dataset.users)
+    return Call(
+        user,
+        "POST",
+        "/expense",
+        json={
+            "telegram_user_id": user,
+            "amount_in_uah": f"{rng.randrange(1, 100000) / 100:.2f}",
+            "description": "load test",
+            "expense_date": random_date(rng).isoformat(),
+        },
+    )
+
+
+def update_call(dataset: Dataset, rng: random.Random) -> Call:
+    user, expense_id = rng.choice(dataset.expenses)
+    return Call(
+        user,
+        "PUT",
+        "/expense",
+        json={
+            "id": expense_id,
+            "telegram_user_id": user,
+            "amount_in_uah": f"{rng.randrange(1, 100000) / 100:.2f}",
+            "description": "load test update",
+        },
+    )
+
+
+def delete_call(dataset: Dataset, rng: random.Random) -> Optional[Call]:
+    if not dataset.deletable:
+        return None
+    user, expense_id = dataset.deletable.pop()
+    return Call(
+        user, "DELETE", f"/expense/{expense_id}", params={"telegram_user_id": user}
+    )
+
+
+# name -> (request factory, accepted status codes)
+ENDPOINTS: Dict[str, Tuple[Callable[..., Optional[Call]], Set[int]]] = {
+    "list": (list_call, {200}),
+    "list_cached": (list_cached_call, {200, 304}),
+    "list_range": (list_range_call, {200}),
+    "summary": (summary_call, {200}),
+    "export": (export_call, {200}),
+    "get": (get_call, {200}),
+    "create": (create_call, {201}),
+    "update": (update_call, {200}),
+    "delete": (delete_call, {200}),
+}
+
+
+def random_date(rng: random.Random) -> date:
+    return date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+async def seed(users: int, expenses_per_user: int) -> Dataset:
+    from src.database import shard_router
+    from src.expenses import crud
+    from src.models import Base
+
+    for engine in shard_router.engines:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(0)
+    by_shard = defaultdict(list)
+    for user in range(users):
+        telegram_user_id = str(100000 + user)
+        for _ in range(expenses_per_user):
+            by_shard[shard_router.shard_for(telegram_user_id)].append(
+                {
+                    "telegram_user_id": telegram_user_id,
+                    "amount_in_uah": Decimal(rng.randrange(1, 1000000)).scaleb(-2),
+                    "description": "synthetic expense " * rng.randrange(1, 4),
+                    "expense_date": random_date(rng),
+                }
+            )
+
+    expenses = []
+    for shard, rows in by_shard.items():
+        for offset in range(0, len(rows), INSERT_CHUNK):
+            async with shard_router.write_session_factories[shard]() as session:
+                created = await crud.create_expenses(
+                    session,
+                    rows[offset : offset + INSERT_CHUNK],
+                    fallback_rate=Decimal(str(STUB_RATE)),
+                )
+            expenses.extend(
+                (expense.telegram_user_id, expense.id) for expense in created
+            )
+
+    return Dataset(expenses)
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    dataset: Dataset,
+    name: str,
+    requests: int,
+    concurrency: int,
+) -> Dict:
+    make_call, accepted = ENDPOINTS[name]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = requests
+
+    async def worker(worker_id: int) -> None:
+        nonlocal remaining
+        rng = random.Random(f"{name}-{worker_id}")
+        while remaining > 0:
+            remaining -= 1
+            call = make_call(dataset, rng)
+            if call is None:
+                return
+
+            started = time.perf_counter()
+            response = await client.request(
+                call.method,
+                call.url,
+                params=call.params,
+                json=call.json,
+                headers=call.headers,
+            )
+            latencies.append(time.perf_counter() - started)
+
+            statuses[response.status_code] += 1
+            if etag := response.headers.get("etag"):
+                dataset.etags[call.user] = etag
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(
+            count for code, count in statuses.items() if code not in accepted
+        ),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "seconds": elapsed,
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    # Settings are read when the app modules are imported, so the database
+    # location must be in the environment first.
+    os.environ.update(
+        PROJECT_ROOT=args.tmp_dir,
+        SQLITE_SHARD_COUNT=str(args.shards),
+        DB_PROFILE="production",
+        BOT_MODE="polling",
+    )
+
+    # The rate provider binds the fetcher at import: stub it before that,
+    # so no request leaves the process.
+    from src.expenses import currency_parser
+
+    currency_parser.get_usd_to_uah = lambda: {"error": None, "result": STUB_RATE}
+
+    from src.api import app
+    from src.database import shard_router
+
+    started = time.perf_counter()
+    dataset = await seed(args.users, args.expenses_per_user)
+    seed_seconds = time.perf_counter() - started
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            for name in args.endpoints:
+                results[name] = await run_endpoint(
+                    client, dataset, name, args.requests, args.concurrency
+                )
+                print_result(name, results[name])
+
+    await shard_router.dispose()
+
+    return {
+        "config": {
+            "users": args.users,
+            "expenses_per_user": args.expenses_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "shards": args.shards,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "seed_seconds": seed_seconds,
+        "endpoints": results,
+    }
+
+
+def print_result(name: str, result: Dict) -> None:
+    print(
+        f"{name:>12}: {result['requests_per_sec']:8.0f} req/s, "
+        f"p50 {result['p50_ms']:7.2f} ms, p95 {result['p95_ms']:7.2f} ms, "
+        f"p99 {result['p99_ms']:7.2f} ms, {result['errors']} errors"
+    )
+
+
+def print_comparison(baseline: Dict, current: Dict) -> None:
+    print("\nChange against baseline:")
+    if baseline.get("config") != current["config"]:
+        print(f"(baseline ran with a different config: {baseline.get('config')})")
+    for name, result in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        rps_change = (
+            result["requests_per_sec"] / before["requests_per_sec"] - 1
+            if before["requests_per_sec"]
+            else 0.0
+        )
+        print(
+            f"{name:>12}: {rps_change:+7.1%} req/s, "
+            f"p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms, "
+            f"p99 {before['p99_ms']:.2f} -> {result['p99_ms']:.2f} ms"
+        )
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        args.tmp_dir = tmp_dir
+        result = asyncio.run(run(args))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    if args.baseline:
+        print_comparison(json.loads(Path(args.baseline).read_text()), result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--expenses-per-user", type=int, default=200)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="Requests per endpoint"
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a run to compare with")
+
+    main(parser.parse_args())
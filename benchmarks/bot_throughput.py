@@ -0,0 +1,480 @@
+"""Measure how many updates per second the bot router handles: scripted
+conversations (add, report, edit, delete) are fed to Dispatcher.feed_update
+with a fake bot session and an in-memory stand-in for the expenses API.
+
+Every simulated user runs its conversations sequentially, as Telegram
+delivers a chat's updates in order; users run concurrently. Picks are made
+from the keyboards the bot sent, so a broken FSM flow shows up as unhandled
+updates instead of silently faster numbers.
+
+Usage:
+    python -m benchmarks.bot_throughput [--users 50] [--rounds 20]
+        [--expenses 30] [--storage memory] [--output run.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import count
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendDocument, TelegramMethod
+from aiogram.types import (
+    CallbackQuery,
+    Chat,
+    Document,
+    InlineKeyboardMarkup,
+    Message,
+    TelegramObject,
+    Update,
+    User,
+)
+
+from benchmarks.api_load import percentile
+from src.expenses.pagination import decode_cursor, encode_cursor
+from src.expenses.pydantic_models import Expense, ExpenseCreate, ExpenseUpdate
+from src.expenses.service import ExpensesServiceError
+from src.models import quantize_cents
+from src.telegram.report_cache import ReportCache
+from src.telegram.router import router
+from src.telegram.storage import SQLiteStorage
+
+STUB_RATE = Decimal(40)
+BOT_USER = User(id=42, is_bot=True, first_name="Bot")
+# Replies of the router's error branches
+ERROR_REPLIES = ("Failed", "An error occurred", "No expense found", "Invalid")
+
+
+class InMemoryExpensesService:
+    """ExpensesService that keeps expenses in dicts, so the numbers measure
+    the bot rather than the API and the database behind it."""
+
+    def __init__(self) -> None:
+        self._expenses: Dict[str, Dict[str, Expense]] = defaultdict(dict)
+        self._versions: Counter = Counter()
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def create_expense(self, payload: Dict) -> Dict:
+        expense_create = ExpenseCreate.model_validate(payload)
+        amount_in_uah = quantize_cents(expense_create.amount_in_uah)
+        expense = Expense(
+            id=str(uuid4()),
+            telegram_user_id=expense_create.telegram_user_id,
+            amount_in_uah=amount_in_uah,
+            amount_in_usd=quantize_cents(amount_in_uah / STUB_RATE),
+            description=expense_create.description,
+            expense_date=expense_create.expense_date,
+        )
+        self._expenses[expense.telegram_user_id][expense.id] = expense
+        self._versions[expense.telegram_user_id] += 1
+        return self._dump(expense)
+
+    async def update_expense(self, payload: Dict) -> Dict:
+        expense_update = ExpenseUpdate.model_validate(payload)
+        user_expenses = self._expenses[expense_update.telegram_user_id]
+        if expense_update.id not in user_expenses:
+            raise ExpensesServiceError(
+                404, f"Expense with id [{expense_update.id}] was not found."
+            )
+
+        amount_in_uah = quantize_cents(expense_update.amount_in_uah)
+        expense = user_expenses[expense_update.id].model_copy(
+            update={
+                "amount_in_uah": amount_in_uah,
+                "amount_in_usd": quantize_cents(amount_in_uah / STUB_RATE),
+                "description": expense_update.description,
+            }
+        )
+        user_expenses[expense.id] = expense
+        self._versions[expense.telegram_user_id] += 1
+        return self._dump(expense)
+
+    async def get_expense(self, expense_id: str, telegram_user_id: str) -> Dict:
+        expense = self._expenses[telegram_user_id].get(expense_id)
+        if not expense:
+            raise ExpensesServiceError(
+                404, f"Expense with id [{expense_id}] was not found."
+            )
+        return self._dump(expense)
+
+    async def delete_expense(
+        self, expense_id: str, telegram_user_id: Optional[str] = None
+    ) -> Dict:
+        users = [telegram_user_id] if telegram_user_id else list(self._expenses)
+        for user in users:
+            if self._expenses[user].pop(expense_id, None):
+                self._versions[user] += 1
+                return {"message": f"[{expense_id}] was deleted"}
+        raise ExpensesServiceError(
+            404, f"Expense with id [{expense_id}] was not found."
+        )
+
+    async def list_expenses(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict]:
+        start = date.fromisoformat(start_date) if start_date else date.min
+        end = date.fromisoformat(end_date) if end_date else date.max
+        return [
+            self._dump(expense)
+            for expense in self._sorted(telegram_user_id)
+            if start <= expense.expense_date <= end
+        ]
+
+    async def list_expenses_page(
+        self,
+        telegram_user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+    ) -> Dict:
+        expenses = self._sorted(telegram_user_id, descending)
+        if cursor:
+            after = decode_cursor(cursor)
+            expenses = [
+                expense
+                for expense in expenses
+                if ((expense.expense_date, expense.id) < after) == descending
+                and (expense.expense_date, expense.id) != after
+            ]
+
+        next_cursor = None
+        if len(expenses) > limit:
+            expenses = expenses[:limit]
+            next_cursor = encode_cursor(expenses[-1].expense_date, expenses[-1].id)
+
+        return {
+            "items": [self._dump(expense) for expense in expenses],
+            "next_cursor": next_cursor,
+        }
+
+    async def get_expenses_version(self, telegram_user_id: str) -> int:
+        return self._versions[telegram_user_id]
+
+    def _sorted(self, telegram_user_id: str, descending: bool = False) -> List:
+        return sorted(
+            self._expenses[telegram_user_id].values(),
+            key=lambda expense: (expense.expense_date, expense.id),
+            reverse=descending,
+        )
+
+    @staticmethod
+    def _dump(expense: Expense) -> Dict:
+        return expense.model_dump(mode="json")
+
+
+class FakeSession(BaseSession):
+    """Answers every Bot API call locally and remembers the last inline
+    keyboard sent to each chat, for the scripted user to press."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.keyboards: Dict[int, InlineKeyboardMarkup] = {}
+        self.calls: Counter = Counter()
+        self.error_replies = 0
+        self._message_ids = count(1)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None
+    ) -> Any:
+        self.calls[type(method).__name__] += 1
+        if method.__returning__ is bool:
+            return True
+
+        chat_id = getattr(method, "chat_id", 0)
+        if (getattr(method, "text", None) or "").startswith(ERROR_REPLIES):
+            self.error_replies += 1
+        reply_markup = getattr(method, "reply_markup", None)
+        if isinstance(reply_markup, InlineKeyboardMarkup):
+            self.keyboards[chat_id] = reply_markup
+
+        document = None
+        if isinstance(method, SendDocument):
+            document = Document(
+                file_id=f"file-{uuid4().hex}", file_unique_id=uuid4().hex
+            )
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=chat_id, type="private"),
+            from_user=BOT_USER,
+            text=getattr(method, "text", None),
+            reply_markup=reply_markup,
+            document=document,
+        )
+
+    async def stream_content(self, *args: Any, **kwargs: Any):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class HandlerTimer(BaseMiddleware):
+    """Inner middleware recording how long each handler takes."""
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            name = data["handler"].callback.__name__
+            self.timings[name].append(time.perf_counter() - started)
+
+
+class ScriptedUser:
+    """Sends a user's side of the conversations, one update at a time."""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        session: FakeSession,
+        user_id: int,
+        update_ids: count,
+        stats: Dict,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.session = session
+        self.user = User(id=user_id, is_bot=False, first_name=f"user{user_id}")
+        self.chat = Chat(id=user_id, type="private")
+        self.rng = random.Random(user_id)
+        self._update_ids = update_ids
+        self._stats = stats
+
+    async def text(self, text: str) -> None:
+        await self._feed(
+            Update(
+                update_id=next(self._update_ids),
+                message=Message(
+                    message_id=next(self._update_ids),
+                    date=datetime.now(),
+                    chat=self.chat,
+                    from_user=self.user,
+                    text=text,
+                ),
+            )
+        )
+
+    async def press(self, data: str) -> None:
+        await self._feed(
+            Update(
+                update_id=next(self._update_ids),
+                callback_query=CallbackQuery(
+                    id=str(next(self._update_ids)),
+                    from_user=self.user,
+                    chat_instance=str(self.chat.id),
+                    data=data,
+                    message=Message(
+                        message_id=next(self._update_ids),
+                        date=datetime.now(),
+                        chat=self.chat,
+                        from_user=BOT_USER,
+                        text="menu",
+                    ),
+                ),
+            )
+        )
+
+    async def press_first_pick(self) -> None:
+        keyboard = self.session.keyboards.get(self.chat.id)
+        buttons = [
+            button.callback_data
+            for row in (keyboard.inline_keyboard if keyboard else [])
+            for button in row
+            if button.callback_data and button.callback_data.startswith("pick:")
+        ]
+        if not buttons:
+            self._stats["missing_picks"] += 1
+            return
+        await self.press(buttons[0])
+
+    async def add_expense(self) -> None:
+        expense_date = date(2024, 1, 1) + timedelta(days=self.rng.randrange(365))
+        await self.press("add_expense")
+        await self.text(f"benchmark expense {self.rng.randrange(1000)}")
+        await self.text(expense_date.strftime("%d.%m.%Y"))
+        await self.text(f"{self.rng.randrange(1, 100000) / 100:.2f}")
+
+    async def report(self) -> None:
+        await self.press("report")
+        await self.text("01.01.2024")
+        await self.text("31.12.2024")
+
+    async def edit_expense(self) -> None:
+        await self.press("edit_expense")
+        await self.press_first_pick()
+        await self.text("edited expense")
+        await self.text(f"{self.rng.randrange(1, 100000) / 100:.2f}")
+
+    async def delete_expense(self) -> None:
+        await self.press("delete_expense")
+        await self.press_first_pick()
+
+    async def run(self, rounds: int) -> None:
+        for _ in range(rounds):
+            await self.add_expense()
+            await self.report()
+            await self.edit_expense()
+            await self.delete_expense()
+
+    async def _feed(self, update: Update) -> None:
+        started = time.perf_counter()
+        result = await self.dispatcher.feed_update(self.bot, update)
+        self._stats["latencies"].append(time.perf_counter() - started)
+        if result is UNHANDLED:
+            self._stats["unhandled"] += 1
+
+
+def latency_stats(timings: List[float]) -> Dict:
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "mean_ms": sum(timings) / len(timings) * 1000 if timings else 0.0,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+    }
+
+
+async def seed(service: InMemoryExpensesService, users: int, expenses: int) -> None:
+    rng = random.Random(0)
+    for user_id in range(1, users + 1):
+        for _ in range(expenses):
+            await service.create_expense(
+                {
+                    "telegram_user_id": str(user_id),
+                    "amount_in_uah": Decimal(rng.randrange(1, 100000)).scaleb(-2),
+                    "description": "seeded expense",
+                    "expense_date": date(2024, 1, 1)
+                    + timedelta(days=rng.randrange(365)),
+                }
+            )
+
+
+async def run(args: argparse.Namespace, tmp_dir: Path) -> Dict:
+    service = InMemoryExpensesService()
+    await seed(service, args.users, args.expenses)
+
+    if args.storage == "sqlite":
+        from src.config import Settings
+
+        storage = SQLiteStorage.from_settings(Settings(PROJECT_ROOT=tmp_dir))
+    else:
+        storage = MemoryStorage()
+
+    dispatcher = Dispatcher(
+        storage=storage,
+        expenses_service=service,
+        report_cache=ReportCache(
+            tmp_dir / "expenses_data", max_bytes=256 * 2**20, max_age=3600
+        ),
+    )
+    timer = HandlerTimer()
+    dispatcher.message.middleware(timer)
+    dispatcher.callback_query.middleware(timer)
+    dispatcher.include_router(router)
+
+    session = FakeSession()
+    bot = Bot("42:BENCHMARK", session=session)
+    stats: Dict = {"latencies": [], "unhandled": 0, "missing_picks": 0}
+    update_ids = count(1)
+    users = [
+        ScriptedUser(dispatcher, bot, session, user_id, update_ids, stats)
+        for user_id in range(1, args.users + 1)
+    ]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user.run(args.rounds) for user in users))
+    elapsed = time.perf_counter() - started
+
+    await storage.close()
+
+    updates = len(stats["latencies"])
+    return {
+        "config": {
+            "users": args.users,
+            "rounds": args.rounds,
+            "expenses": args.expenses,
+            "storage": args.storage,
+        },
+        "updates": updates,
+        "seconds": elapsed,
+        "updates_per_sec": updates / elapsed if elapsed else 0.0,
+        "unhandled_updates": stats["unhandled"],
+        "missing_picks": stats["missing_picks"],
+        "error_replies": session.error_replies,
+        "feed_update": latency_stats(stats["latencies"]),
+        "handlers": {
+            name: latency_stats(timings)
+            for name, timings in sorted(timer.timings.items())
+        },
+        "bot_api_calls": dict(session.calls),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        result = asyncio.run(run(args, Path(tmp_dir)))
+
+    print(
+        f"{result['updates']} updates in {result['seconds']:.2f}s "
+        f"({result['updates_per_sec']:.0f} updates/s), "
+        f"{result['unhandled_updates']} unhandled, "
+        f"{result['missing_picks']} missing picks, "
+        f"{result['error_replies']} error replies"
+    )
+    for name, stats in [("feed_update", result["feed_update"])] + list(
+        result["handlers"].items()
+    ):
+        print(
+            f"{name:>28}: {stats['count']:6d} calls, "
+            f"p50 {stats['p50_ms']:6.2f} ms, p95 {stats['p95_ms']:6.2f} ms, "
+            f"p99 {stats['p99_ms']:6.2f} ms"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument(
+        "--rounds", type=int, default=20, help="Add/report/edit/delete rounds per user"
+    )
+    parser.add_argument(
+        "--expenses", type=int, default=30, help="Expenses seeded per user"
+    )
+    parser.add_argument("--storage", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+
+    main(parser.parse_args())
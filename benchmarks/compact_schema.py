@@ -0,0 +1,174 @@
+"""Compare the legacy expenses schema (string ids, Numeric amounts) with the
+compact one (16-byte UUIDs, integer cents): size, aggregation and row loads.
+
+Usage:
+    python -m benchmarks.compact_schema [--rows 1000000] [--users 1000]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+from uuid import uuid4
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Engine,
+    Index,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    create_engine,
+    func,
+    insert,
+    select,
+    text,
+)
+
+from src.models import Base, Expense
+
+INSERT_CHUNK = 50000
+LOADED_USERS = 50
+REPEAT = 5
+
+legacy_metadata = MetaData()
+legacy_expenses = Table(
+    "expenses",
+    legacy_metadata,
+    Column("id", String(255), primary_key=True),
+    Column("telegram_user_id", String(255), nullable=False),
+    Column("amount_in_uah", Numeric(10, 2), nullable=False),
+    Column("amount_in_usd", Numeric(10, 2), nullable=False),
+    Column("255", String(), nullable=False),
+    Column("expense_date", Date(), nullable=False),
+    Index(
+        "ix_expenses_telegram_user_id_expense_date_id",
+        "telegram_user_id",
+        "expense_date",
+        "id",
+    ),
+)
+SCHEMAS = {
+    "legacy": (legacy_metadata, legacy_expenses, "255"),
+    "compact": (Base.metadata, Expense.__table__, "description"),
+}
+
+
+def generate_rows(rows: int, users: int, description: str) -> Iterator[Dict]:
+    rng = random.Random(0)
+    start = date(2024, 1, 1)
+    for _ in range(rows):
+        amount_in_uah = Decimal(rng.randrange(1, 1000000)).scaleb(-2)
+        yield {
+            "id": str(uuid4()),
+            "telegram_user_id": str(rng.randrange(users)),
+            "amount_in_uah": amount_in_uah,
+            "amount_in_usd": (amount_in_uah / 40).quantize(Decimal("0.01")),
+            description: "benchmark expense",
+            "expense_date": start + timedelta(days=rng.randrange(365)),
+        }
+
+
+def seed(engine: Engine, schema: str, rows: int, users: int) -> None:
+    metadata, table, description = SCHEMAS[schema]
+    metadata.create_all(engine)
+
+    batch = []
+    with engine.begin() as connection:
+        for row in generate_rows(rows, users, description):
+            batch.append(row)
+            if len(batch) == INSERT_CHUNK:
+                connection.execute(insert(table), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(table), batch)
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("VACUUM")
+
+
+def object_sizes(engine: Engine) -> Dict[str, int]:
+    """Bytes per table/index, if SQLite was built with the dbstat table."""
+    with engine.connect() as connection:
+        try:
+            rows = connection.execute(
+                text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")
+            ).all()
+        except Exception:
+            return {}
+    return {name: size for name, size in rows}
+
+
+def timed(operation: Callable[[], object]) -> float:
+    """Best of REPEAT runs, so both schemas are compared with a warm cache."""
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_schema(schema: str, db_path: Path, rows: int, users: int) -> Dict:
+    _, table, _ = SCHEMAS[schema]
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    seed(engine, schema, rows, users)
+
+    def aggregate() -> None:
+        with engine.connect() as connection:
+            connection.execute(
+                select(
+                    table.c.telegram_user_id,
+                    func.sum(table.c.amount_in_uah),
+                    func.sum(table.c.amount_in_usd),
+                ).group_by(table.c.telegram_user_id)
+            ).all()
+
+    def load_users() -> None:
+        # Full rows through the column types, as the ORM would load them.
+        with engine.connect() as connection:
+            for user in range(LOADED_USERS):
+                connection.execute(
+                    select(table).filter(table.c.telegram_user_id == str(user))
+                ).all()
+
+    result = {
+        "schema": schema,
+        "file_bytes": db_path.stat().st_size,
+        "objects": object_sizes(engine),
+        "aggregate_seconds": timed(aggregate),
+        "load_seconds": timed(load_users),
+    }
+    engine.dispose()
+    return result
+
+
+def main(rows: int, users: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for schema in SCHEMAS:
+            result = run_schema(
+                schema, Path(tmp_dir) / f"{schema}.sqlite3", rows, users
+            )
+            print(
+                f"{result['schema']:>8}: {result['file_bytes'] / 2**20:.1f} MiB, "
+                f"GROUP BY all rows {result['aggregate_seconds'] * 1000:.0f} ms, "
+                f"load {LOADED_USERS} users {result['load_seconds'] * 1000:.0f} ms"
+            )
+            for name, size in sorted(result["objects"].items()):
+                print(f"{'':>10}{name}: {size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    main(args.rows, args.users)
@@ -0,0 +1,124 @@
+"""Compare SQLite engine profiles (see Settings.DB_PROFILE) under a mixed load.
+
+Usage:
+    python -m benchmarks.engine_profiles [--workers 32] [--ops 200] [--seed 10000]
+"""
+
+import argparse
+import asyncio
+import collections
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Counter, Dict
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.config import Settings
+from src.database import ShardRouter
+from src.expenses import crud
+from src.models import Base
+
+PROFILES = ("development", "production")
+USERS = 100
+
+
+async def run_profile(profile: str, workers: int, ops: int, seed: int) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = Settings(
+            PROJECT_ROOT=Path(tmp_dir), DB_PROFILE=profile, SQLITE_SHARD_COUNT=1
+        )
+        router = ShardRouter.from_settings(settings)
+        # Compare pragmas and pooling only, not the cost of logging every query.
+        for engine in router.engines + router.write_engines:
+            engine.echo = False
+        session_factory = router.session_factories[0]
+        write_session_factory = router.write_session_factories[0]
+
+        async with router.write_engines[0].begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        rng = random.Random(0)
+        start = date(2024, 1, 1)
+        async with write_session_factory() as session:
+            await crud.create_expenses(
+                session,
+                [
+                    {
+                        "telegram_user_id": str(rng.randrange(USERS)),
+                        "amount_in_uah": Decimal(rng.randrange(1, 10000)),
+                        "description": "seed",
+                        "expense_date": start + timedelta(days=rng.randrange(365)),
+                    }
+                    for _ in range(seed)
+                ],
+                fallback_rate=Decimal(40),
+            )
+
+        # Failed operations are counted rather than raised, so a profile that
+        # cannot keep up with the load shows how often it fails and why.
+        failures: Counter[str] = collections.Counter()
+
+        async def worker(worker_id: int) -> None:
+            rng = random.Random(worker_id)
+            for _ in range(ops):
+                user = str(rng.randrange(USERS))
+                write = rng.random() < 0.3
+                try:
+                    if write:
+                        async with write_session_factory() as session:
+                            await crud.create_expense(
+                                session,
+                                user,
+                                Decimal(rng.randrange(1, 10000)),
+                                "bench",
+                                start + timedelta(days=rng.randrange(365)),
+                                fallback_rate=Decimal(40),
+                            )
+                    else:
+                        async with session_factory() as session:
+                            await crud.get_user_expenses_page(session, user, 100)
+                except SQLAlchemyError as e:
+                    error = getattr(e, "orig", None) or e
+                    failures[f"{'write' if write else 'read'}: {error}"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(workers)))
+        elapsed = time.perf_counter() - started
+
+        await router.dispose()
+
+    total = workers * ops
+    return {
+        "profile": profile,
+        "ops": total,
+        "failed": sum(failures.values()),
+        "failures": dict(failures),
+        "seconds": elapsed,
+        "ops_per_sec": total / elapsed,
+    }
+
+
+async def main(workers: int, ops: int, seed: int) -> None:
+    for profile in PROFILES:
+        result = await run_profile(profile, workers, ops, seed)
+        print(
+            f"{result['profile']:>12}: {result['ops']} ops in "
+            f"{result['seconds']:.2f}s ({result['ops_per_sec']:.0f} ops/s), "
+            f"{result['failed']} failed"
+        )
+        for failure, count in sorted(result["failures"].items()):
+            print(f"{'':>14}{count} x {failure}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=10000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.workers, args.ops, args.seed))
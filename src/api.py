@@ -1,7 +1,53 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+from src.config import get_settings
+from src.expenses.rates import usd_to_uah_provider
 from src.expenses.router import router as expenses_router
+from src.expenses.write_queue import close_expense_writers, start_expense_writers
+from src.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Request handlers never wait on the upstream, only startup does.
+    await usd_to_uah_provider.warm_up(settings.USD_TO_UAH_RATE_STARTUP_TIMEOUT)
+    await start_expense_writers()
+
+    if settings.BOT_MODE == "webhook":
+        from src.telegram.webhook import TelegramWebhook
+
+        app.state.telegram_webhook = TelegramWebhook.from_settings(settings)
+        await app.state.telegram_webhook.start()
+
+    yield
 
-app = FastAPI()
+    if getattr(app.state, "telegram_webhook", None) is not None:
+        await app.state.telegram_webhook.close()
+        app.state.telegram_webhook = None
+    await close_expense_writers()
+    await usd_to_uah_provider.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(expenses_router)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.post(settings.BOT_WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(request: Request):
+    webhook = getattr(request.app.state, "telegram_webhook", None)
+    if webhook is None:
+        raise HTTPException(status_code=404, detail="Webhook mode is disabled.")
+    return await webhook.handle(request)
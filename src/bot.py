@@ -1,24 +1,71 @@
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
 
 import asyncio
 
 from src.config import get_settings
+from src.expenses.service import ExpensesService, LocalExpensesService
+from src.log import get_logger
+from src.telegram.api_client import ExpensesAPIClient
+from src.telegram.report_cache import ReportCache
 from src.telegram.router import router
+from src.telegram.storage import SQLiteStorage
 
+logger = get_logger(__name__)
 settings = get_settings()
 
 
-async def main():
-    dp = Dispatcher()
-    bot = Bot(
-        token=settings.BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+def create_expenses_service() -> ExpensesService:
+    if settings.BOT_EXPENSES_TRANSPORT == "local":
+        return LocalExpensesService()
+    return ExpensesAPIClient.from_settings(settings)
+
+
+def create_fsm_storage() -> BaseStorage:
+    if settings.BOT_FSM_STORAGE == "sqlite":
+        return SQLiteStorage.from_settings(settings)
+    return MemoryStorage()
+
+
+def create_dispatcher() -> Dispatcher:
+    expenses_service = create_expenses_service()
+
+    # `expenses_service` and `report_cache` are passed to every handler that
+    # declares them.
+    dp = Dispatcher(
+        storage=create_fsm_storage(),
+        expenses_service=expenses_service,
+        report_cache=ReportCache.from_settings(settings),
     )
+    dp.startup.register(expenses_service.start)
+    dp.shutdown.register(expenses_service.close)
 
     dp.include_router(router)
     # dp.message.outer_middleware(UserAllowedMiddleware())
+    return dp
+
+
+def create_bot() -> Bot:
+    return Bot(
+        token=settings.BOT_TOKEN,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+    )
+
+
+async def main():
+    if settings.BOT_MODE == "webhook":
+        # Deleting the webhook to poll would cut off the API process serving it.
+        logger.error("BOT_MODE is 'webhook': updates are served by the API, not polled")
+        raise SystemExit(1)
+
+    dp = create_dispatcher()
+    bot = create_bot()
+
+    # Polling cannot receive updates while a webhook is registered.
+    await bot.delete_webhook()
     await dp.start_polling(bot)
 
 
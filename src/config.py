@@ -1,5 +1,6 @@
 from pathlib import Path
 from functools import lru_cache
+from typing import List, Literal
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,15 +10,118 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "TestTask API"
 
     SQLITE_DB_NAME: str = "db.sqlite3"
+    # Number of SQLite files users are hashed into. 1 keeps the single
+    # SQLITE_DB_NAME file; changing it requires moving existing rows.
+    SQLITE_SHARD_COUNT: int = 1
+
+    # SQLite engine profile: "production" applies the pragmas and pool sizing
+    # below to every pooled connection and serializes writers on one
+    # connection per shard, "development" keeps SQLAlchemy's defaults and
+    # echoes every statement
+    DB_PROFILE: Literal["development", "production"] = "development"
+    DB_POOL_SIZE: int = 8
+    DB_MAX_OVERFLOW: int = 16
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    # How long a writer waits for the write lock, both for the shard's write
+    # connection in this process and for SQLite's lock held by other processes
+    SQLITE_BUSY_TIMEOUT_MS: int = 15000
+    SQLITE_CACHE_SIZE: int = -64000  # negative values are KiB
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHED_STATEMENTS: int = 256
+
+    # Group commit of concurrent single-expense writes (window in seconds)
+    WRITE_COALESCING_ENABLED: bool = True
+    WRITE_COALESCING_WINDOW: float = 0.002
+    WRITE_COALESCING_MAX_BATCH: int = 100
 
     BOT_TOKEN: str = ""
 
+    # How the bot reaches expenses: "http" through the API, or "local" by
+    # calling the CRUD layer in-process on single-box deployments
+    BOT_EXPENSES_TRANSPORT: Literal["http", "local"] = "http"
+
+    # "webhook" serves the bot from the API app: Telegram posts updates to
+    # BOT_WEBHOOK_URL (public base URL) + BOT_WEBHOOK_PATH with the
+    # BOT_WEBHOOK_SECRET token. Without a URL, or if Telegram rejects it, the
+    # API process falls back to polling.
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    BOT_WEBHOOK_URL: str = ""
+    BOT_WEBHOOK_PATH: str = "/telegram/webhook"
+    BOT_WEBHOOK_SECRET: str = ""
+    BOT_WEBHOOK_MAX_CONCURRENCY: int = 100
+
+    # Expenses per page of the edit/delete picker keyboard
+    BOT_PICKER_PAGE_SIZE: int = 8
+
+    # Bot FSM state: "memory" is per process; "sqlite" survives restarts and is
+    # shared by bot workers. Conversations idle for BOT_FSM_TTL seconds expire.
+    # A worker may cache entries for BOT_FSM_CACHE_TTL seconds, which is only
+    # safe when it is the sole worker: others would see its writes late.
+    BOT_FSM_STORAGE: Literal["memory", "sqlite"] = "sqlite"
+    BOT_FSM_SQLITE_DB_NAME: str = "fsm.sqlite3"
+    BOT_FSM_TTL: int = 24 * 60 * 60
+    BOT_FSM_CACHE_SIZE: int = 1024
+    BOT_FSM_CACHE_TTL: float = 0
+
+    # Bot -> expenses API HTTP client (seconds where applicable)
+    API_BASE_URL: str = "http://localhost:8000"
+    API_CONNECTION_LIMIT: int = 100
+    API_KEEPALIVE_TIMEOUT: float = 30
+    API_TIMEOUT: float = 10
+    API_CONNECT_TIMEOUT: float = 3
+    API_RETRIES: int = 2
+    API_RETRY_BACKOFF: float = 0.2
+
+    # USD -> UAH exchange rate provider (seconds)
+    USD_TO_UAH_RATE_TTL: float = 15 * 60
+    USD_TO_UAH_RATE_REFRESH_AHEAD: float = 60
+    USD_TO_UAH_RATE_RETRY_INTERVAL: float = 30
+    USD_TO_UAH_FALLBACK_RATE: float = 42
+    # How long API startup waits for the first rate before serving requests
+    USD_TO_UAH_RATE_STARTUP_TIMEOUT: float = 5
+
+    # How far back a stored daily rate may be reused for an expense date
+    EXCHANGE_RATE_LOOKBACK_DAYS: int = 7
+
+    # Bot XLSX reports cached under PROJECT_ROOT/expenses_data (age in seconds)
+    REPORT_CACHE_MAX_BYTES: int = 100 * 1024 * 1024
+    REPORT_CACHE_MAX_AGE: int = 7 * 24 * 60 * 60
+
+    # Prometheus-style metrics of HTTP requests, SQL statements and caches,
+    # served on GET /metrics
+    METRICS_ENABLED: bool = True
+
+    EXPENSES_PAGE_SIZE: int = 100
+    EXPENSES_MAX_PAGE_SIZE: int = 1000
+    EXPENSES_EXPORT_BATCH_SIZE: int = 1000
+    EXPENSES_MAX_CREATE_BATCH_SIZE: int = 1000
+
     @computed_field
     @property
     def ASYNC_SQLITE_ALCHEMY_URI(self) -> str:
         schema = "sqlite+aiosqlite"
         return f"{schema}:///{self.PROJECT_ROOT}/{self.SQLITE_DB_NAME}"
 
+    @computed_field
+    @property
+    def ASYNC_SQLITE_FSM_URI(self) -> str:
+        schema = "sqlite+aiosqlite"
+        return f"{schema}:///{self.PROJECT_ROOT}/{self.BOT_FSM_SQLITE_DB_NAME}"
+
+    @computed_field
+    @property
+    def ASYNC_SQLITE_SHARD_URIS(self) -> List[str]:
+        if self.SQLITE_SHARD_COUNT <= 1:
+            return [self.ASYNC_SQLITE_ALCHEMY_URI]
+
+        schema = "sqlite+aiosqlite"
+        db_name = Path(self.SQLITE_DB_NAME)
+        return [
+            f"{schema}:///{self.PROJECT_ROOT}/{db_name.stem}.shard{shard}{db_name.suffix}"
+            for shard in range(self.SQLITE_SHARD_COUNT)
+        ]
+
     model_config = SettingsConfigDict(
         env_file=PROJECT_ROOT / ".env", env_ignore_empty=True, extra="ignore"
     )
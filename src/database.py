@@ -1,9 +1,155 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
-from src.config import get_settings
+import zlib
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from src.config import Settings, get_settings
+from src.metrics import instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(settings.ASYNC_SQLITE_ALCHEMY_URI, echo=True)
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
-)
+
+def create_engine_from_settings(
+    settings: Settings, url: Optional[str] = None, writer: bool = False
+) -> AsyncEngine:
+    """Engine for the SQLite file at `url` configured by `settings.DB_PROFILE`.
+
+    A production `writer` engine has a single connection that begins every
+    transaction with BEGIN IMMEDIATE, so writers of this process queue for it
+    instead of starving each other while polling SQLite's lock.
+    """
+    url = url or settings.ASYNC_SQLITE_ALCHEMY_URI
+
+    if settings.DB_PROFILE == "development":
+        engine = create_async_engine(url, echo=True)
+        if settings.METRICS_ENABLED:
+            instrument_engine(engine)
+        return engine
+
+    if writer:
+        pooling = dict(
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        )
+    else:
+        pooling = dict(
+            pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW
+        )
+    engine = create_async_engine(
+        url,
+        echo=False,
+        connect_args={"cached_statements": settings.SQLITE_CACHED_STATEMENTS},
+        **pooling,
+    )
+
+    pragmas = (
+        f"journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"mmap_size={settings.SQLITE_MMAP_SIZE}",
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if writer:
+            # The driver's own BEGIN is deferred; `begin_immediate` emits it.
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    if writer:
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def begin_immediate(connection):
+            # A deferred transaction that has already read fails at once with
+            # "database is locked" when it cannot upgrade to a write lock,
+            # without waiting for busy_timeout.
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+    return engine
+
+
+class ShardRouter:
+    """Routes each user's data to one of N SQLite files.
+
+    A user always maps to the same shard (stable CRC32 of telegram_user_id),
+    so writers of unrelated users contend for different database locks.
+    Reference data such as exchange_rates is kept in every shard.
+
+    Writes go through `write_session_factories`, which are bound to separate
+    `write_engines` when given (see `create_engine_from_settings`) and to the
+    read engines otherwise.
+    """
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        write_engines: Optional[List[AsyncEngine]] = None,
+    ) -> None:
+        self.engines = engines
+        self.write_engines = write_engines or engines
+        self.session_factories = [make_session_factory(e) for e in self.engines]
+        self.write_session_factories = [
+            make_session_factory(e) for e in self.write_engines
+        ]
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ShardRouter":
+        urls = settings.ASYNC_SQLITE_SHARD_URIS
+        write_engines = None
+        if settings.DB_PROFILE == "production":
+            write_engines = [
+                create_engine_from_settings(settings, url, writer=True) for url in urls
+            ]
+        return cls(
+            [create_engine_from_settings(settings, url) for url in urls],
+            write_engines,
+        )
+
+    def shard_for(self, telegram_user_id: str) -> int:
+        return zlib.crc32(telegram_user_id.encode()) % len(self.engines)
+
+    def session_factory(
+        self, telegram_user_id: str
+    ) -> async_sessionmaker[AsyncSession]:
+        return self.session_factories[self.shard_for(telegram_user_id)]
+
+    def session(self, telegram_user_id: str) -> AsyncSession:
+        return self.session_factory(telegram_user_id)()
+
+    def write_session(self, telegram_user_id: str) -> AsyncSession:
+        return self.write_session_factories[self.shard_for(telegram_user_id)]()
+
+    def candidate_session_factories(
+        self, telegram_user_id: Optional[str], write: bool = False
+    ) -> List[async_sessionmaker[AsyncSession]]:
+        """Session factories that may hold a row, for lookups by id alone."""
+        factories = self.write_session_factories if write else self.session_factories
+        if telegram_user_id:
+            return [factories[self.shard_for(telegram_user_id)]]
+        return factories
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+        if self.write_engines is not self.engines:
+            for engine in self.write_engines:
+                await engine.dispose()
+
+
+def make_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+shard_router = ShardRouter.from_settings(settings)
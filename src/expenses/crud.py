@@ -1,33 +1,208 @@
-from datetime import date, datetime
+import bisect
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional
-from sqlalchemy import select
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from uuid import uuid4
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    Float,
+    Integer,
+    Select,
+    String,
+    Update,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import Expense
+from src.config import get_settings
+from src.models import Expense, ExchangeRate, ExpenseVersion, quantize_cents
+
+settings = get_settings()
+
+# Inclusive date range bound: a date, or a string in yyyy-mm-dd format
+DateBound = Optional[Union[date, str]]
+
+USD_TO_UAH_PAIR = "USD/UAH"
+
+# Columns of the API's Expense schema, in its field order
+EXPENSE_ROW_COLUMNS = (
+    Expense.telegram_user_id,
+    Expense.amount_in_uah,
+    Expense.description,
+    Expense.id,
+    Expense.amount_in_usd,
+    Expense.expense_date,
+)
+
+# SQLite strftime formats used as GROUP BY keys for summaries; weeks are keyed
+# by their Monday instead, so a week spanning New Year stays one bucket.
+SUMMARY_PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+async def get_exchange_rate_on_date(
+    session: AsyncSession, on_date: date, pair: str = USD_TO_UAH_PAIR
+) -> Optional[Decimal]:
+    """Return the latest stored rate published on or shortly before `on_date`."""
+    result = await session.execute(
+        select(ExchangeRate.rate)
+        .filter(
+            ExchangeRate.pair == pair,
+            ExchangeRate.date <= on_date,
+            ExchangeRate.date
+            >= on_date - timedelta(days=settings.EXCHANGE_RATE_LOOKBACK_DAYS),
+        )
+        .order_by(ExchangeRate.date.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def get_exchange_rates_on_dates(
+    session: AsyncSession, dates: Iterable[date], pair: str = USD_TO_UAH_PAIR
+) -> Dict[date, Decimal]:
+    """Resolve `get_exchange_rate_on_date` for many dates with one range read.
+
+    Dates without a recent enough stored rate are left out of the result.
+    """
+    dates = set(dates)
+    if not dates:
+        return {}
+
+    lookback = timedelta(days=settings.EXCHANGE_RATE_LOOKBACK_DAYS)
+    result = await session.execute(
+        select(ExchangeRate.date, ExchangeRate.rate)
+        .filter(
+            ExchangeRate.pair == pair,
+            ExchangeRate.date <= max(dates),
+            ExchangeRate.date >= min(dates) - lookback,
+        )
+        .order_by(ExchangeRate.date)
+    )
+    stored = result.all()
+    stored_dates = [rate_date for rate_date, _ in stored]
+
+    rates = {}
+    for on_date in dates:
+        position = bisect.bisect_right(stored_dates, on_date) - 1
+        if position >= 0 and stored_dates[position] >= on_date - lookback:
+            rates[on_date] = stored[position].rate
+    return rates
+
+
+async def upsert_exchange_rates(
+    session: AsyncSession, rates: Dict[date, Decimal], pair: str = USD_TO_UAH_PAIR
+) -> int:
+    if not rates:
+        return 0
+
+    stmt = insert(ExchangeRate)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ExchangeRate.pair, ExchangeRate.date],
+        set_={"rate": stmt.excluded.rate},
+    )
+    await session.execute(
+        stmt,
+        [
+            {"pair": pair, "date": rate_date, "rate": rate}
+            for rate_date, rate in rates.items()
+        ],
+    )
+    await session.commit()
+    return len(rates)
+
+
+async def convert_uah_to_usd(
+    session: AsyncSession,
+    amount_in_uah: Decimal,
+    on_date: date,
+    fallback_rate: Decimal,
+) -> Decimal:
+    rate = await get_exchange_rate_on_date(session, on_date) or fallback_rate
+    return quantize_cents(amount_in_uah / rate)
 
 
 async def create_expense(
     session: AsyncSession,
     telegram_user_id: str,
     amount_in_uah: Decimal,
-    amount_in_usd: Decimal,
     description: str,
     date: date,
+    fallback_rate: Decimal,
+    commit: bool = True,
 ) -> Expense:
+    amount_in_uah = quantize_cents(amount_in_uah)
     new_expense = Expense(
         telegram_user_id=telegram_user_id,
         amount_in_uah=amount_in_uah,
-        amount_in_usd=amount_in_usd,
+        amount_in_usd=await convert_uah_to_usd(
+            session, amount_in_uah, date, fallback_rate
+        ),
         description=description,
         expense_date=date,
     )
 
     session.add(new_expense)
-    await session.commit()
+    await bump_expenses_versions(session, [telegram_user_id])
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
     return new_expense
 
 
+async def create_expenses(
+    session: AsyncSession, expenses: List[Dict], fallback_rate: Decimal
+) -> List[Expense]:
+    """Insert many expenses with a single executemany in one transaction.
+
+    Each item is a dict with telegram_user_id, amount_in_uah, description
+    and expense_date keys, as in the `ExpenseCreate` model; rates are
+    resolved once per distinct expense date.
+    """
+    rates = await get_exchange_rates_on_dates(
+        session, (expense["expense_date"] for expense in expenses)
+    )
+
+    rows = []
+    for expense in expenses:
+        amount_in_uah = quantize_cents(expense["amount_in_uah"])
+        rate = rates.get(expense["expense_date"], fallback_rate)
+        rows.append(
+            {
+                "id": str(uuid4()),
+                "telegram_user_id": expense["telegram_user_id"],
+                "amount_in_uah": amount_in_uah,
+                "amount_in_usd": quantize_cents(amount_in_uah / rate),
+                "description": expense["description"],
+                "expense_date": expense["expense_date"],
+            }
+        )
+    if rows:
+        await session.execute(insert(Expense), rows)
+        await bump_expenses_versions(session, (row["telegram_user_id"] for row in rows))
+        await session.commit()
+
+    return [Expense(**row) for row in rows]
+
+
 async def get_all_expenses(session: AsyncSession) -> Optional[List[Expense]]:
     result = await session.execute(select(Expense))
     expenses = result.scalars().all()
@@ -47,49 +222,353 @@ async def get_all_user_expenses(
 async def get_all_user_expenses_on_date_range(
     session: AsyncSession,
     telegram_user_id: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
+    start_date: DateBound = None,
+    end_date: DateBound = None,
 ) -> Optional[List[Expense]]:
     query = select(Expense).filter(Expense.telegram_user_id == telegram_user_id)
+    query = filter_by_date_range(query, start_date, end_date)
 
-    if start_date:
-        start_date_obj = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(Expense.expense_date >= start_date_obj)
+    result = await session.execute(query)
+    expenses = result.scalars().all()
+    return list(expenses)
 
-    if end_date:
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-        query = query.filter(Expense.expense_date <= end_date_obj)
+
+async def get_user_expenses_page(
+    session: AsyncSession,
+    telegram_user_id: str,
+    limit: int,
+    after: Optional[Tuple[date, str]] = None,
+    start_date: DateBound = None,
+    end_date: DateBound = None,
+    descending: bool = False,
+) -> List[Expense]:
+    """Return up to `limit` expenses ordered by (expense_date, id), strictly after
+    the `after` keyset position (newest first when `descending`)."""
+    query = user_expenses_page_query(
+        select(Expense),
+        telegram_user_id,
+        limit,
+        after,
+        start_date,
+        end_date,
+        descending,
+    )
 
     result = await session.execute(query)
     expenses = result.scalars().all()
     return list(expenses)
 
 
+async def get_user_expense_rows_page(
+    session: AsyncSession,
+    telegram_user_id: str,
+    limit: int,
+    after: Optional[Tuple[date, str]] = None,
+    start_date: DateBound = None,
+    end_date: DateBound = None,
+    descending: bool = False,
+) -> List[RowMapping]:
+    """`get_user_expenses_page` as plain column rows, for read-only listings.
+
+    Selecting columns instead of entities skips the identity map and attribute
+    instrumentation; rows come back in EXPENSE_ROW_COLUMNS order.
+    """
+    query = user_expenses_page_query(
+        select(*EXPENSE_ROW_COLUMNS),
+        telegram_user_id,
+        limit,
+        after,
+        start_date,
+        end_date,
+        descending,
+    )
+
+    result = await session.execute(query)
+    return list(result.mappings().all())
+
+
+def user_expenses_page_query(
+    query: Select,
+    telegram_user_id: str,
+    limit: int,
+    after: Optional[Tuple[date, str]],
+    start_date: DateBound,
+    end_date: DateBound,
+    descending: bool = False,
+) -> Select:
+    keyset = tuple_(Expense.expense_date, Expense.id)
+    order_by = (Expense.expense_date, Expense.id)
+    if descending:
+        order_by = (Expense.expense_date.desc(), Expense.id.desc())
+
+    query = (
+        query.filter(Expense.telegram_user_id == telegram_user_id)
+        .order_by(*order_by)
+        .limit(limit)
+    )
+    query = filter_by_date_range(query, start_date, end_date)
+
+    if after:
+        query = query.filter(
+            keyset < tuple(after) if descending else keyset > tuple(after)
+        )
+
+    return query
+
+
+async def stream_user_expenses_on_date_range(
+    session: AsyncSession,
+    telegram_user_id: str,
+    start_date: DateBound = None,
+    end_date: DateBound = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Expense]:
+    """Yield a user's expenses as the database returns them, `batch_size` rows
+    at a time, without buffering the whole result."""
+    query = (
+        select(Expense)
+        .filter(Expense.telegram_user_id == telegram_user_id)
+        .order_by(Expense.expense_date, Expense.id)
+        .execution_options(yield_per=batch_size)
+    )
+    query = filter_by_date_range(query, start_date, end_date)
+
+    result = await session.stream_scalars(query)
+    async for expense in result:
+        yield expense
+
+
+async def get_user_expenses_summary(
+    session: AsyncSession,
+    telegram_user_id: str,
+    group_by: str = "month",
+    start_date: DateBound = None,
+    end_date: DateBound = None,
+) -> List[Dict]:
+    """Aggregate a user's expenses into per-period buckets in one GROUP BY."""
+    if group_by == "week":
+        period = func.date(Expense.expense_date, "weekday 0", "-6 days", type_=String)
+    else:
+        period = func.strftime(SUMMARY_PERIOD_FORMATS[group_by], Expense.expense_date)
+
+    query = (
+        select(
+            period.label("period"),
+            func.count(Expense.id).label("count"),
+            func.sum(Expense.amount_in_uah).label("total_uah"),
+            func.sum(Expense.amount_in_usd).label("total_usd"),
+        )
+        .filter(Expense.telegram_user_id == telegram_user_id)
+        .group_by(period)
+        .order_by(period)
+    )
+    query = filter_by_date_range(query, start_date, end_date)
+
+    result = await session.execute(query)
+    return [dict(row) for row in result.mappings().all()]
+
+
+def filter_by_date_range(
+    query: Select, start_date: DateBound, end_date: DateBound
+) -> Select:
+    """Bounds are inclusive dates, or strings in yyyy-mm-dd format."""
+    if start_date:
+        query = query.filter(Expense.expense_date >= to_date(start_date))
+
+    if end_date:
+        query = query.filter(Expense.expense_date <= to_date(end_date))
+
+    return query
+
+
+def to_date(value: Union[date, str]) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
 async def get_expense_by_id(
-    session: AsyncSession, expense_id: str
+    session: AsyncSession, expense_id: str, telegram_user_id: Optional[str] = None
 ) -> Optional[Expense]:
-    result = await session.execute(select(Expense).filter(Expense.id == expense_id))
+    """When `telegram_user_id` is given the expense must belong to that user."""
+    query = select(Expense).filter(Expense.id == expense_id)
+    if telegram_user_id:
+        query = query.filter(Expense.telegram_user_id == telegram_user_id)
+
+    result = await session.execute(query)
     expense = result.scalars().first()
     return expense
 
 
+def exchange_rate_on(
+    on_date: Any, fallback_rate: Decimal, pair: str = USD_TO_UAH_PAIR
+) -> ColumnElement:
+    """SQL expression for `get_exchange_rate_on_date(on_date) or fallback_rate`.
+
+    `on_date` may be a column (e.g. Expense.expense_date), so the lookup can be
+    evaluated inside an UPDATE without reading the row first.
+    """
+    if isinstance(on_date, date):
+        on_date = literal(on_date, Date)
+
+    stored_rate = (
+        select(ExchangeRate.rate)
+        .filter(
+            ExchangeRate.pair == pair,
+            ExchangeRate.date <= on_date,
+            ExchangeRate.date
+            >= func.date(on_date, f"-{settings.EXCHANGE_RATE_LOOKBACK_DAYS} days"),
+        )
+        .order_by(ExchangeRate.date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return func.coalesce(stored_rate, fallback_rate)
+
+
+def build_update_statement(
+    telegram_user_id: Optional[str],
+    expense_ids: List[str],
+    fallback_rate: Optional[Decimal],
+    **kwargs,
+) -> Optional[Update]:
+    values = {}
+    for key, value in kwargs.items():
+        column = Expense.__table__.columns.get(key)
+        # None clears a nullable column and leaves a NOT NULL one unchanged.
+        if column is not None and (value is not None or column.nullable):
+            values[key] = value
+    if "amount_in_uah" in values and fallback_rate is not None:
+        # Amounts are stored in cents: divide as REAL, round back to INTEGER.
+        amount_in_uah = literal(values["amount_in_uah"], Expense.amount_in_uah.type)
+        values["amount_in_usd"] = cast(
+            func.round(
+                cast(amount_in_uah, Float)
+                / exchange_rate_on(
+                    values.get("expense_date", Expense.expense_date), fallback_rate
+                )
+            ),
+            Integer,
+        )
+
+    stmt = update(Expense).filter(Expense.id.in_(expense_ids)).returning(Expense)
+    if telegram_user_id:
+        stmt = stmt.filter(Expense.telegram_user_id == telegram_user_id)
+
+    return stmt.values(**values) if values else None
+
+
 async def update_expense(
-    session: AsyncSession, expense_id: str, **kwargs
+    session: AsyncSession,
+    expense_id: str,
+    telegram_user_id: Optional[str] = None,
+    fallback_rate: Optional[Decimal] = None,
+    commit: bool = True,
+    **kwargs,
 ) -> Optional[Expense]:
-    expense = await get_expense_by_id(session, expense_id)
-    if expense:
-        for key, value in kwargs.items():
-            if hasattr(expense, key):
-                setattr(expense, key, value)
-            session.add(expense)
-            await session.commit()
-    return expense
+    """Update one expense with a single UPDATE ... RETURNING.
+
+    None clears a nullable column; NOT NULL columns such as `description`
+    keep their value instead of failing the update.
+    When `telegram_user_id` is given the expense must belong to that user.
+    Passing `amount_in_uah` together with `fallback_rate` also recomputes
+    `amount_in_usd` with the stored rate of the expense date.
+    """
+    expenses = await update_expenses(
+        session, [expense_id], telegram_user_id, fallback_rate, commit, **kwargs
+    )
+    return expenses[0] if expenses else None
+
 
+async def update_expenses(
+    session: AsyncSession,
+    expense_ids: List[str],
+    telegram_user_id: Optional[str] = None,
+    fallback_rate: Optional[Decimal] = None,
+    commit: bool = True,
+    **kwargs,
+) -> List[Expense]:
+    stmt = build_update_statement(
+        telegram_user_id, expense_ids, fallback_rate, **kwargs
+    )
+    if stmt is None:
+        query = select(Expense).filter(Expense.id.in_(expense_ids))
+        if telegram_user_id:
+            query = query.filter(Expense.telegram_user_id == telegram_user_id)
+        result = await session.execute(query)
+        return list(result.scalars().all())
 
-async def delete_expense(session, expense_id: str) -> bool:
-    expense = await get_expense_by_id(session, expense_id)
-    if expense:
-        await session.delete(expense)
+    # The session may already hold these rows (coalesced writes share one),
+    # so let the RETURNING values overwrite them instead of being discarded.
+    result = await session.execute(
+        stmt,
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    )
+    expenses = list(result.scalars().all())
+    await bump_expenses_versions(
+        session, (expense.telegram_user_id for expense in expenses)
+    )
+    if commit:
         await session.commit()
-        return True
-    return False
+    return expenses
+
+
+async def delete_expense(
+    session: AsyncSession, expense_id: str, telegram_user_id: Optional[str] = None
+) -> bool:
+    return bool(await delete_expenses(session, [expense_id], telegram_user_id))
+
+
+async def delete_expenses(
+    session: AsyncSession,
+    expense_ids: List[str],
+    telegram_user_id: Optional[str] = None,
+) -> List[str]:
+    """Delete expenses with a single DELETE ... RETURNING and return their ids."""
+    stmt = (
+        delete(Expense)
+        .filter(Expense.id.in_(expense_ids))
+        .returning(Expense.id, Expense.telegram_user_id)
+    )
+    if telegram_user_id:
+        stmt = stmt.filter(Expense.telegram_user_id == telegram_user_id)
+
+    result = await session.execute(
+        stmt, execution_options={"synchronize_session": False}
+    )
+    deleted = result.all()
+    await bump_expenses_versions(session, (row.telegram_user_id for row in deleted))
+    await session.commit()
+    return [row.id for row in deleted]
+
+
+async def bump_expenses_versions(
+    session: AsyncSession, telegram_user_ids: Iterable[str]
+) -> None:
+    """Mark the users' expenses as changed, in the caller's transaction."""
+    telegram_user_ids = sorted(set(telegram_user_ids))
+    if not telegram_user_ids:
+        return
+
+    stmt = insert(ExpenseVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ExpenseVersion.telegram_user_id],
+        set_={"version": ExpenseVersion.version + 1},
+    )
+    await session.execute(
+        stmt,
+        [
+            {"telegram_user_id": telegram_user_id, "version": 1}
+            for telegram_user_id in telegram_user_ids
+        ],
+    )
+
+
+async def get_expenses_version(session: AsyncSession, telegram_user_id: str) -> int:
+    """Current value of the counter bumped by every write to the user's expenses."""
+    result = await session.execute(
+        select(ExpenseVersion.version).filter(
+            ExpenseVersion.telegram_user_id == telegram_user_id
+        )
+    )
+    return result.scalar() or 0
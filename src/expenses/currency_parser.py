@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from typing import Dict
 from curl_cffi import requests
 from lxml import html
@@ -24,3 +25,33 @@ def get_usd_to_uah() -> Dict:
             "error": "Unkown mistake while getting USD to UAH exchange rate.",
             "result": None,
         }
+
+
+def get_usd_to_uah_history(start_date: date, end_date: date) -> Dict:
+    url = "https://bank.gov.ua/NBU_Exchange/exchange_site"
+    params = {
+        "start": start_date.strftime("%Y%m%d"),
+        "end": end_date.strftime("%Y%m%d"),
+        "valcode": "usd",
+        "sort": "exchangedate",
+        "order": "asc",
+        "json": "",
+    }
+    response = requests.get(url, params=params)
+
+    if response.status_code != 200:
+        return {"error": "Failed to fetch historical currency data.", "result": None}
+
+    try:
+        rates = {
+            datetime.strptime(item["exchangedate"], "%d.%m.%Y").date(): float(
+                item["rate"]
+            )
+            for item in response.json()
+        }
+        return {"error": None, "result": rates}
+    except Exception:
+        return {
+            "error": "Unkown mistake while parsing historical USD to UAH exchange rates.",
+            "result": None,
+        }
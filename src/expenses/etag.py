@@ -0,0 +1,43 @@
+from typing import Dict, Optional
+
+from fastapi import status
+from fastapi.responses import Response
+
+# Clients may keep the response but must revalidate it before reuse.
+CACHE_CONTROL = "private, no-cache"
+
+# Bump whenever a deploy changes the body returned for the same expenses
+# (fields, formatting), so responses cached before it stop matching.
+REPRESENTATION_VERSION = 1
+
+
+def expenses_etag(version: int, representation: str) -> str:
+    """ETag of a `representation` ("list", "summary") of a user's expenses at
+    the given expenses version.
+
+    The version changes with every write to the user's expenses, and the
+    rest of the representation is fixed by the request URL.
+    """
+    return f'"{representation}.{REPRESENTATION_VERSION}-v{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag)
+    )
@@ -0,0 +1,54 @@
+import csv
+import io
+from typing import AsyncIterator, Callable, Dict, List
+
+from src.expenses.pydantic_models import Expense
+from src.models import Expense as ExpenseModel
+
+EXPORT_FIELDS: List[str] = list(Expense.model_fields)
+
+
+async def iter_ndjson(
+    expenses: AsyncIterator[ExpenseModel], chunk_size: int
+) -> AsyncIterator[bytes]:
+    chunk: List[bytes] = []
+
+    async for expense in expenses:
+        chunk.append(Expense.model_validate(expense).model_dump_json().encode())
+        if len(chunk) >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk.clear()
+
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+async def iter_csv(
+    expenses: AsyncIterator[ExpenseModel], chunk_size: int
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    rows = 0
+
+    async for expense in expenses:
+        writer.writerow(Expense.model_validate(expense).model_dump(mode="json"))
+        rows += 1
+        if rows % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+EXPORT_FORMATS: Dict[str, Callable[..., AsyncIterator[bytes]]] = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import date
+from typing import Tuple
+
+
+def encode_cursor(expense_date: date, expense_id: str) -> str:
+    """Encode the (expense_date, id) keyset position of a row into an opaque token."""
+    raw = json.dumps([expense_date.isoformat(), expense_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, str]:
+    """Inverse of `encode_cursor`. Raises ValueError on a malformed token."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        expense_date, expense_id = json.loads(base64.urlsafe_b64decode(padded))
+        return date.fromisoformat(expense_date), str(expense_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor [{cursor}].") from e
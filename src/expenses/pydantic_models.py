@@ -1,7 +1,7 @@
 from datetime import date
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, TypeAdapter, field_validator
 from decimal import Decimal
-from typing import Optional
+from typing import List, Literal, Optional, TypedDict
 
 
 class ExpenseBase(BaseModel):
@@ -29,3 +29,55 @@ class Expense(ExpenseBase):
         json_encoders = {
             date: lambda v: v.strftime("%d.%m.%Y")  # Format date as dd.mm.YYYY
         }
+
+
+class ExpenseRow(TypedDict):
+    """Expense as a plain dict, for column rows that skip the ORM and models."""
+
+    telegram_user_id: str
+    amount_in_uah: Decimal
+    description: Optional[str]
+    id: str
+    amount_in_usd: Decimal
+    expense_date: date
+
+
+expense_rows_adapter = TypeAdapter(List[ExpenseRow])
+
+
+class ExpensePage(BaseModel):
+    items: List[Expense]
+    next_cursor: Optional[str] = None
+
+
+class ExpenseSummaryBucket(BaseModel):
+    period: str
+    count: int
+    total_uah: Decimal
+    total_usd: Decimal
+
+
+class ExpenseSummary(BaseModel):
+    telegram_user_id: str
+    group_by: Literal["day", "week", "month"]
+    count: int
+    total_uah: Decimal
+    total_usd: Decimal
+    buckets: List[ExpenseSummaryBucket]
+
+
+class ExpensesVersion(BaseModel):
+    telegram_user_id: str
+    version: int
+
+
+class ExpenseBatchItemResult(BaseModel):
+    index: int
+    expense: Optional[Expense] = None
+    error: Optional[str] = None
+
+
+class ExpenseBatchResult(BaseModel):
+    created: int
+    failed: int
+    results: List[ExpenseBatchItemResult]
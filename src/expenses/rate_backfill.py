@@ -0,0 +1,68 @@
+"""Backfill the exchange_rates table with historical NBU USD/UAH rates.
+
+Usage:
+    python -m src.expenses.rate_backfill 2024-01-01 [2024-12-31]
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from src.database import shard_router
+from src.expenses.crud import upsert_exchange_rates
+from src.expenses.currency_parser import get_usd_to_uah_history
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+# Keep single upstream requests reasonably small.
+CHUNK_DAYS = 90
+
+
+async def backfill_usd_to_uah_rates(
+    start_date: date, end_date: Optional[date] = None
+) -> int:
+    end_date = end_date or date.today()
+    stored = 0
+
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end_date)
+
+        history = await asyncio.to_thread(
+            get_usd_to_uah_history, chunk_start, chunk_end
+        )
+        if error := history["error"]:
+            logger.warning(f"{error} ({chunk_start} - {chunk_end})")
+        else:
+            rates = {
+                rate_date: Decimal(str(rate))
+                for rate_date, rate in history["result"].items()
+            }
+            # Rates are reference data and are replicated into every shard.
+            for session_factory in shard_router.write_session_factories:
+                async with session_factory() as session:
+                    await upsert_exchange_rates(session, rates)
+            stored += len(rates)
+
+        chunk_start = chunk_end + timedelta(days=1)
+
+    logger.info(f"Stored {stored} USD/UAH rates for {start_date} - {end_date}.")
+    return stored
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("start_date", type=parse_date, help="yyyy-mm-dd")
+    parser.add_argument(
+        "end_date", type=parse_date, nargs="?", default=None, help="yyyy-mm-dd"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(backfill_usd_to_uah_rates(args.start_date, args.end_date))
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from src.config import get_settings
+from src.expenses.currency_parser import get_usd_to_uah
+from src.log import get_logger
+from src.metrics import cache_requests, usd_to_uah_fetch_duration
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class ExchangeRateProvider:
+    """Serves an exchange rate from memory and refreshes it in the background.
+
+    `get_rate` never waits on the network: it returns the cached rate (even if
+    it is already stale) or the fallback rate on a cold cache, and schedules a
+    refresh when the cached value is close to expiry. Concurrent refreshes are
+    deduplicated into a single in-flight task.
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[], Dict],
+        ttl: float,
+        refresh_ahead: float,
+        retry_interval: float,
+        fallback_rate: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._fetcher = fetcher
+        self._clock = clock
+        self._ttl = ttl
+        self._refresh_ahead = min(refresh_ahead, ttl)
+        self._retry_interval = retry_interval
+        self._fallback_rate = fallback_rate
+
+        self._rate: Optional[float] = None
+        self._fetched_at: float = 0.0
+        self._last_attempt_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return self._rate is None or self._clock() - self._fetched_at >= self._ttl
+
+    async def get_rate(self) -> float:
+        if self._should_refresh():
+            self._schedule_refresh()
+
+        if self._rate is None:
+            cache_requests.inc("usd_to_uah_rate", "miss")
+            return self._fallback_rate
+
+        if self.is_stale:
+            cache_requests.inc("usd_to_uah_rate", "stale")
+            logger.warning("Serving stale exchange rate while it is being refreshed.")
+        else:
+            cache_requests.inc("usd_to_uah_rate", "hit")
+
+        return self._rate
+
+    async def refresh(self) -> Optional[float]:
+        """Refresh the rate now, joining an already running refresh if any."""
+        return await asyncio.shield(self._schedule_refresh())
+
+    async def warm_up(self, timeout: float) -> None:
+        """Wait (briefly) for the first rate at startup.
+
+        Early writes are then not converted with the fallback rate; on timeout
+        the refresh keeps running in the background.
+        """
+        try:
+            await asyncio.wait_for(self.refresh(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Exchange rate is not fetched yet, starting with the fallback"
+            )
+
+    async def close(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+
+    def _should_refresh(self) -> bool:
+        if self._refresh_task and not self._refresh_task.done():
+            return False
+
+        now = self._clock()
+        if (
+            self._rate is not None
+            and now - self._fetched_at < self._ttl - self._refresh_ahead
+        ):
+            return False
+
+        # Do not hammer the upstream after a failed attempt.
+        if (
+            self._last_attempt_at is not None
+            and now - self._last_attempt_at < self._retry_interval
+        ):
+            return False
+
+        return True
+
+    def _schedule_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def _refresh(self) -> Optional[float]:
+        self._last_attempt_at = self._clock()
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(self._fetcher)
+        except Exception as e:
+            usd_to_uah_fetch_duration.observe(time.perf_counter() - started, "error")
+            logger.warning(f"Failed to refresh exchange rate: {e}")
+            return self._rate
+
+        if error := result["error"]:
+            usd_to_uah_fetch_duration.observe(time.perf_counter() - started, "error")
+            logger.warning(error)
+            return self._rate
+
+        usd_to_uah_fetch_duration.observe(time.perf_counter() - started, "ok")
+
+        self._rate = result["result"]
+        self._fetched_at = self._clock()
+        return self._rate
+
+
+usd_to_uah_provider = ExchangeRateProvider(
+    fetcher=get_usd_to_uah,
+    ttl=settings.USD_TO_UAH_RATE_TTL,
+    refresh_ahead=settings.USD_TO_UAH_RATE_REFRESH_AHEAD,
+    retry_interval=settings.USD_TO_UAH_RATE_RETRY_INTERVAL,
+    fallback_rate=settings.USD_TO_UAH_FALLBACK_RATE,
+)
@@ -1,102 +1,367 @@
+from collections import defaultdict
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Query
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Body, Header, HTTPException, status, Query
+from fastapi.responses import Response, StreamingResponse
 
-from src.database import AsyncSessionLocal
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.config import get_settings
+from src.database import shard_router
 from src.expenses.crud import (
     create_expense,
+    create_expenses,
     delete_expense,
-    get_all_user_expenses,
-    get_all_user_expenses_on_date_range,
+    delete_expenses,
+    get_expense_by_id,
+    get_expenses_version,
+    get_user_expense_rows_page,
+    get_user_expenses_summary,
+    stream_user_expenses_on_date_range,
     update_expense,
 )
-from src.expenses.currency_parser import get_usd_to_uah
+from src.expenses.etag import (
+    cache_headers,
+    etag_matches,
+    expenses_etag,
+    not_modified,
+)
+from src.expenses.export import EXPORT_FORMATS, EXPORT_MEDIA_TYPES
+from src.expenses.pagination import decode_cursor, encode_cursor
 from src.expenses.pydantic_models import (
     Expense,
+    ExpenseBatchItemResult,
+    ExpenseBatchResult,
     ExpenseCreate,
+    ExpensePage,
+    ExpenseSummary,
+    ExpenseSummaryBucket,
     ExpenseUpdate,
+    ExpensesVersion,
+    expense_rows_adapter,
 )
+from src.expenses.rates import usd_to_uah_provider
+from src.expenses.serialization import dumps
+from src.expenses.write_queue import expense_writer_for
 from src.log import get_logger
 
 logger = get_logger(__name__)
+settings = get_settings()
 
 router = APIRouter()
 
 
 @router.post("/expense", response_model=Expense, status_code=status.HTTP_201_CREATED)
 async def add_expense(expense: ExpenseCreate):
-    usd_to_uah_result = get_usd_to_uah()
-    if error := usd_to_uah_result["error"]:
-        logger.warning(error)
-        usd_to_uah_rate = 42
-    else:
-        usd_to_uah_rate = usd_to_uah_result["result"]
+    usd_to_uah_rate = await usd_to_uah_provider.get_rate()
 
-    async with AsyncSessionLocal() as session:
-        new_expense = await create_expense(
+    return await expense_writer_for(expense.telegram_user_id).submit(
+        lambda session: create_expense(
             session,
             expense.telegram_user_id,
             expense.amount_in_uah,
-            expense.amount_in_uah / Decimal(usd_to_uah_rate),
             expense.description or "",
             expense.expense_date,
+            fallback_rate=Decimal(str(usd_to_uah_rate)),
+            commit=False,
+        )
+    )
+
+
+@router.post(
+    "/expenses/batch", response_model=ExpenseBatchResult, status_code=status.HTTP_200_OK
+)
+async def add_expenses(
+    items: List[Dict[str, Any]] = Body(
+        ...,
+        max_length=settings.EXPENSES_MAX_CREATE_BATCH_SIZE,
+        description="List of ExpenseCreate objects",
+    ),
+):
+    results: List[ExpenseBatchItemResult] = []
+    valid: Dict[int, ExpenseCreate] = {}
+
+    for index, item in enumerate(items):
+        try:
+            valid[index] = ExpenseCreate.model_validate(item)
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            )
+            results.append(ExpenseBatchItemResult(index=index, error=error))
+
+    usd_to_uah_rate = await usd_to_uah_provider.get_rate()
+
+    # Each shard gets its own single-transaction insert.
+    shard_indexes: Dict[int, List[int]] = defaultdict(list)
+    for index, expense in valid.items():
+        shard_indexes[shard_router.shard_for(expense.telegram_user_id)].append(index)
+
+    # A failed shard fails only its own items: the other shards' inserts are
+    # independent transactions and stay committed.
+    created = 0
+    for shard, indexes in shard_indexes.items():
+        try:
+            async with shard_router.write_session_factories[shard]() as session:
+                new_expenses = await create_expenses(
+                    session,
+                    [
+                        {
+                            "telegram_user_id": valid[index].telegram_user_id,
+                            "amount_in_uah": valid[index].amount_in_uah,
+                            "description": valid[index].description or "",
+                            "expense_date": valid[index].expense_date,
+                        }
+                        for index in indexes
+                    ],
+                    fallback_rate=Decimal(str(usd_to_uah_rate)),
+                )
+        except SQLAlchemyError:
+            logger.exception(f"Batch insert of {len(indexes)} expenses failed")
+            results.extend(
+                ExpenseBatchItemResult(index=index, error="Failed to store the expense")
+                for index in indexes
+            )
+            continue
+
+        created += len(new_expenses)
+        results.extend(
+            ExpenseBatchItemResult(index=index, expense=new_expense)
+            for index, new_expense in zip(indexes, new_expenses)
         )
-        return new_expense
+    results.sort(key=lambda result: result.index)
+
+    return ExpenseBatchResult(
+        created=created,
+        failed=len(items) - created,
+        results=results,
+    )
 
 
-@router.get("/expenses", response_model=List[Expense], status_code=status.HTTP_200_OK)
+@router.get("/expenses", response_model=ExpensePage, status_code=status.HTTP_200_OK)
 async def get_expenses(
     expense_telegram_user_id: str,
-    start_date: Optional[str] = Query(
+    start_date: Optional[date] = Query(
         None, alias="start_date", description="Start date in format yyyy-mm-dd"
     ),
-    end_date: Optional[str] = Query(
+    end_date: Optional[date] = Query(
         None, alias="end_date", description="End date in format yyyy-mm-dd"
     ),
+    limit: int = Query(
+        settings.EXPENSES_PAGE_SIZE,
+        ge=1,
+        le=settings.EXPENSES_MAX_PAGE_SIZE,
+        description="Maximum number of expenses in the page",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor returned with the previous page"
+    ),
+    order: Literal["asc", "desc"] = Query(
+        "asc", description="By date: oldest (asc) or newest (desc) first"
+    ),
+    if_none_match: Optional[str] = Header(None),
 ):
-    async with AsyncSessionLocal() as session:
-        result = await get_all_user_expenses_on_date_range(
-            session, expense_telegram_user_id, start_date=start_date, end_date=end_date
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async with shard_router.session(expense_telegram_user_id) as session:
+        # The version is read before the rows, so the rows are never older
+        # than the ETag that is sent with them.
+        etag = expenses_etag(
+            await get_expenses_version(session, expense_telegram_user_id), "list"
         )
-        return result
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        # Fetch one extra row to know whether another page exists.
+        rows = await get_user_expense_rows_page(
+            session,
+            expense_telegram_user_id,
+            limit + 1,
+            after=after,
+            start_date=start_date,
+            end_date=end_date,
+            descending=order == "desc",
+        )
+
+    # Validate the column rows once and serialize them directly, instead of
+    # loading entities and re-validating each one into ExpensePage.
+    expenses = expense_rows_adapter.validate_python(rows[:limit])
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(expenses[-1]["expense_date"], expenses[-1]["id"])
+
+    return Response(
+        content=dumps({"items": expenses, "next_cursor": next_cursor}),
+        media_type="application/json",
+        headers=cache_headers(etag),
+    )
+
+
+@router.get("/expenses/export", status_code=status.HTTP_200_OK)
+async def export_expenses(
+    expense_telegram_user_id: str,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    start_date: Optional[date] = Query(
+        None, alias="start_date", description="Start date in format yyyy-mm-dd"
+    ),
+    end_date: Optional[date] = Query(
+        None, alias="end_date", description="End date in format yyyy-mm-dd"
+    ),
+):
+    batch_size = settings.EXPENSES_EXPORT_BATCH_SIZE
+
+    async def export_chunks():
+        async with shard_router.session(expense_telegram_user_id) as session:
+            expenses = stream_user_expenses_on_date_range(
+                session,
+                expense_telegram_user_id,
+                start_date=start_date,
+                end_date=end_date,
+                batch_size=batch_size,
+            )
+            async for chunk in EXPORT_FORMATS[format](expenses, batch_size):
+                yield chunk
+
+    return StreamingResponse(
+        export_chunks(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="expenses.{format}"'},
+    )
+
+
+@router.get(
+    "/expenses/summary", response_model=ExpenseSummary, status_code=status.HTTP_200_OK
+)
+async def get_expenses_summary(
+    response: Response,
+    expense_telegram_user_id: str,
+    group_by: Literal["day", "week", "month"] = Query(
+        "month", description="Bucket size of the summary"
+    ),
+    start_date: Optional[date] = Query(
+        None, alias="start_date", description="Start date in format yyyy-mm-dd"
+    ),
+    end_date: Optional[date] = Query(
+        None, alias="end_date", description="End date in format yyyy-mm-dd"
+    ),
+    if_none_match: Optional[str] = Header(None),
+):
+    async with shard_router.session(expense_telegram_user_id) as session:
+        etag = expenses_etag(
+            await get_expenses_version(session, expense_telegram_user_id), "summary"
+        )
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        buckets = await get_user_expenses_summary(
+            session,
+            expense_telegram_user_id,
+            group_by=group_by,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    response.headers.update(cache_headers(etag))
+    return ExpenseSummary(
+        telegram_user_id=expense_telegram_user_id,
+        group_by=group_by,
+        count=sum(bucket["count"] for bucket in buckets),
+        total_uah=sum((bucket["total_uah"] for bucket in buckets), Decimal("0.00")),
+        total_usd=sum((bucket["total_usd"] for bucket in buckets), Decimal("0.00")),
+        buckets=[ExpenseSummaryBucket(**bucket) for bucket in buckets],
+    )
+
+
+@router.get(
+    "/expenses/version",
+    response_model=ExpensesVersion,
+    status_code=status.HTTP_200_OK,
+)
+async def get_expenses_version_of_user(expense_telegram_user_id: str):
+    """Counter that changes with every write to the user's expenses."""
+    async with shard_router.session(expense_telegram_user_id) as session:
+        version = await get_expenses_version(session, expense_telegram_user_id)
+
+    return ExpensesVersion(telegram_user_id=expense_telegram_user_id, version=version)
+
+
+@router.get(
+    "/expense/{expense_id}", response_model=Expense, status_code=status.HTTP_200_OK
+)
+async def get_expense(
+    expense_id: str,
+    telegram_user_id: str = Query(..., description="Owner of the expense"),
+):
+    async with shard_router.session(telegram_user_id) as session:
+        expense = await get_expense_by_id(session, expense_id, telegram_user_id)
+
+    if not expense:
+        raise HTTPException(
+            status_code=404, detail=f"Expense with id [{expense_id}] was not found."
+        )
+
+    return expense
 
 
 @router.put("/expense", response_model=Expense, status_code=status.HTTP_200_OK)
 async def change_expense(expense_update: ExpenseUpdate):
-    usd_to_uah_result = get_usd_to_uah()
-    if error := usd_to_uah_result["error"]:
-        logger.warning(error)
-        usd_to_uah_rate = 42
-    else:
-        usd_to_uah_rate = usd_to_uah_result["result"]
+    usd_to_uah_rate = await usd_to_uah_provider.get_rate()
 
-    async with AsyncSessionLocal() as session:
-        result = await update_expense(
+    result = await expense_writer_for(expense_update.telegram_user_id).submit(
+        lambda session: update_expense(
             session,
             expense_id=expense_update.id,
             telegram_user_id=expense_update.telegram_user_id,
+            fallback_rate=Decimal(str(usd_to_uah_rate)),
+            commit=False,
             amount_in_uah=expense_update.amount_in_uah,
-            amount_in_usd=expense_update.amount_in_uah / Decimal(usd_to_uah_rate),
             description=expense_update.description,
         )
-        if not result:
-            return HTTPException(
-                status_code=404,
-                detail=f"Expense with id [{expense_update.id}] was not found.",
-            )
+    )
+    if not result:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Expense with id [{expense_update.id}] was not found.",
+        )
 
-        return result
+    return result
 
 
 @router.delete("/expense/{expense_id}")
-async def remove_expense(expense_id: str):
-    async with AsyncSessionLocal() as session:
-        result = await delete_expense(session, expense_id)
-
-        if not result:
-            return HTTPException(
-                status_code=404, detail=f"Expense with id [{expense_id}] was not found."
-            )
+async def remove_expense(
+    expense_id: str,
+    telegram_user_id: Optional[str] = Query(
+        None, description="Only delete the expense if it belongs to this user"
+    ),
+):
+    for session_factory in shard_router.candidate_session_factories(
+        telegram_user_id, write=True
+    ):
+        async with session_factory() as session:
+            if await delete_expense(session, expense_id, telegram_user_id):
+                break
+    else:
+        raise HTTPException(
+            status_code=404, detail=f"Expense with id [{expense_id}] was not found."
+        )
 
     return {"message": f"[{expense_id}] was deleted"}
+
+
+@router.delete("/expenses")
+async def remove_expenses(
+    expense_telegram_user_id: str,
+    expense_ids: List[str] = Query(..., alias="id", description="Expense ids"),
+):
+    async with shard_router.write_session(expense_telegram_user_id) as session:
+        deleted_ids = await delete_expenses(
+            session, expense_ids, expense_telegram_user_id
+        )
+
+    return {"deleted": deleted_ids}
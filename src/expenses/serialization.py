@@ -0,0 +1,20 @@
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import orjson
+
+
+def orjson_default(value: Any) -> Any:
+    # Match the pydantic Expense schema: Decimals as strings, dates as dd.mm.yyyy.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.strftime("%d.%m.%Y")
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content, default=orjson_default, option=orjson.OPT_PASSTHROUGH_DATETIME
+    )
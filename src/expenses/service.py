@@ -0,0 +1,192 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, Protocol
+
+from src.config import get_settings
+from src.database import shard_router
+from src.expenses import crud
+from src.expenses.pagination import decode_cursor, encode_cursor
+from src.expenses.pydantic_models import Expense, ExpenseCreate, ExpenseUpdate
+from src.expenses.rates import usd_to_uah_provider
+from src.expenses.write_queue import (
+    close_expense_writers,
+    expense_writer_for,
+    start_expense_writers,
+)
+
+settings = get_settings()
+
+
+class ExpensesServiceError(Exception):
+    """Raised by every ExpensesService transport with an HTTP-like status."""
+
+    def __init__(self, status: int, detail: str = "") -> None:
+        super().__init__(f"Expenses service responded with {status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class ExpensesService(Protocol):
+    """Operations the bot needs, independent of how they reach the database.
+
+    Payloads and results use the JSON shapes of the HTTP API.
+    """
+
+    async def start(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+    async def create_expense(self, payload: Dict) -> Dict: ...
+
+    async def update_expense(self, payload: Dict) -> Dict: ...
+
+    async def get_expense(self, expense_id: str, telegram_user_id: str) -> Dict: ...
+
+    async def delete_expense(
+        self, expense_id: str, telegram_user_id: Optional[str] = None
+    ) -> Dict: ...
+
+    async def list_expenses(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict]: ...
+
+    async def list_expenses_page(
+        self,
+        telegram_user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+    ) -> Dict: ...
+
+    async def get_expenses_version(self, telegram_user_id: str) -> int: ...
+
+
+class LocalExpensesService:
+    """In-process transport: calls the CRUD layer directly instead of the API."""
+
+    async def start(self) -> None:
+        await usd_to_uah_provider.warm_up(settings.USD_TO_UAH_RATE_STARTUP_TIMEOUT)
+        await start_expense_writers()
+
+    async def close(self) -> None:
+        await close_expense_writers()
+        await usd_to_uah_provider.close()
+
+    async def create_expense(self, payload: Dict) -> Dict:
+        expense = ExpenseCreate.model_validate(payload)
+
+        fallback_rate = await self._fallback_rate()
+
+        new_expense = await expense_writer_for(expense.telegram_user_id).submit(
+            lambda session: crud.create_expense(
+                session,
+                expense.telegram_user_id,
+                expense.amount_in_uah,
+                expense.description or "",
+                expense.expense_date,
+                fallback_rate=fallback_rate,
+                commit=False,
+            )
+        )
+        return self._dump(new_expense)
+
+    async def update_expense(self, payload: Dict) -> Dict:
+        expense_update = ExpenseUpdate.model_validate(payload)
+
+        fallback_rate = await self._fallback_rate()
+
+        result = await expense_writer_for(expense_update.telegram_user_id).submit(
+            lambda session: crud.update_expense(
+                session,
+                expense_id=expense_update.id,
+                telegram_user_id=expense_update.telegram_user_id,
+                fallback_rate=fallback_rate,
+                commit=False,
+                amount_in_uah=expense_update.amount_in_uah,
+                description=expense_update.description,
+            )
+        )
+        if not result:
+            raise ExpensesServiceError(
+                404, f"Expense with id [{expense_update.id}] was not found."
+            )
+        return self._dump(result)
+
+    async def get_expense(self, expense_id: str, telegram_user_id: str) -> Dict:
+        async with shard_router.session(telegram_user_id) as session:
+            expense = await crud.get_expense_by_id(
+                session, expense_id, telegram_user_id
+            )
+        if not expense:
+            raise ExpensesServiceError(
+                404, f"Expense with id [{expense_id}] was not found."
+            )
+        return self._dump(expense)
+
+    async def delete_expense(
+        self, expense_id: str, telegram_user_id: Optional[str] = None
+    ) -> Dict:
+        for session_factory in shard_router.candidate_session_factories(
+            telegram_user_id, write=True
+        ):
+            async with session_factory() as session:
+                if await crud.delete_expense(session, expense_id, telegram_user_id):
+                    break
+        else:
+            raise ExpensesServiceError(
+                404, f"Expense with id [{expense_id}] was not found."
+            )
+        return {"message": f"[{expense_id}] was deleted"}
+
+    async def list_expenses(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict]:
+        async with shard_router.session(telegram_user_id) as session:
+            expenses = await crud.get_all_user_expenses_on_date_range(
+                session, telegram_user_id, start_date=start_date, end_date=end_date
+            )
+        return [self._dump(expense) for expense in expenses]
+
+    async def list_expenses_page(
+        self,
+        telegram_user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+    ) -> Dict:
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise ExpensesServiceError(400, str(e))
+
+        async with shard_router.session(telegram_user_id) as session:
+            expenses = await crud.get_user_expenses_page(
+                session, telegram_user_id, limit + 1, after, descending=descending
+            )
+
+        next_cursor = None
+        if len(expenses) > limit:
+            expenses = expenses[:limit]
+            next_cursor = encode_cursor(expenses[-1].expense_date, expenses[-1].id)
+
+        return {
+            "items": [self._dump(expense) for expense in expenses],
+            "next_cursor": next_cursor,
+        }
+
+    async def get_expenses_version(self, telegram_user_id: str) -> int:
+        async with shard_router.session(telegram_user_id) as session:
+            return await crud.get_expenses_version(session, telegram_user_id)
+
+    @staticmethod
+    async def _fallback_rate() -> Decimal:
+        return Decimal(str(await usd_to_uah_provider.get_rate()))
+
+    @staticmethod
+    def _dump(expense) -> Dict:
+        return Expense.model_validate(expense).model_dump(mode="json")
@@ -0,0 +1,163 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import get_settings
+from src.database import shard_router
+from src.log import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteCoalescer:
+    """Group-commits concurrent writes into one transaction.
+
+    Operations submitted within `window` seconds of the first queued one (up
+    to `max_batch` of them) run in a single session and share one COMMIT, so
+    a burst of writes pays for one fsync instead of one each. Operations must
+    not commit themselves (crud functions take `commit=False`).
+
+    If any operation in a batch fails, the batch is rolled back and each
+    operation is retried in its own transaction, so one bad write only fails
+    its own caller.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float,
+        max_batch: int,
+        enabled: bool = True,
+    ) -> None:
+        self._session_factory = session_factory
+        self._window = window
+        self._max_batch = max_batch
+        self._enabled = enabled
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._enabled and (self._worker is None or self._worker.done()):
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._worker is None:
+            return
+
+        await self._queue.join()  # type: ignore
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    async def submit(self, operation: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        if not self._enabled:
+            return await self._run_single(operation)
+
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))  # type: ignore
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = self._queue  # type: ignore
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._window
+
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[WriteOperation, asyncio.Future]]) -> None:
+        try:
+            async with self._session_factory() as session:
+                results = []
+                for operation, _ in batch:
+                    results.append(await operation(session))
+                    # Operations may return the same row; detach this result
+                    # so the next one does not overwrite it in the identity map.
+                    await session.flush()
+                    session.expunge_all()
+                await session.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                self._set_exception(batch[0][1], e)
+                return
+
+            logger.warning(f"Write batch of {len(batch)} failed, retrying one by one")
+            for operation, future in batch:
+                try:
+                    self._set_result(future, await self._run_single(operation))
+                except Exception as e:
+                    self._set_exception(future, e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            self._set_result(future, result)
+
+    async def _run_single(self, operation: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        async with self._session_factory() as session:
+            result = await operation(session)
+            await session.commit()
+            return result
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result: Any) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, exception: Exception) -> None:
+        if not future.done():
+            future.set_exception(exception)
+
+
+# One writer per shard: a batch can only share a transaction within one file.
+expense_writers = [
+    WriteCoalescer(
+        session_factory,
+        window=settings.WRITE_COALESCING_WINDOW,
+        max_batch=settings.WRITE_COALESCING_MAX_BATCH,
+        enabled=settings.WRITE_COALESCING_ENABLED,
+    )
+    for session_factory in shard_router.write_session_factories
+]
+
+
+def expense_writer_for(telegram_user_id: str) -> WriteCoalescer:
+    return expense_writers[shard_router.shard_for(telegram_user_id)]
+
+
+async def start_expense_writers() -> None:
+    for writer in expense_writers:
+        await writer.start()
+
+
+async def close_expense_writers() -> None:
+    for writer in expense_writers:
+        await writer.close()
@@ -0,0 +1,263 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Metrics are plain dicts keyed by label values and are updated from the event
+loop thread, so recording a sample costs a dict lookup and an addition.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, LabelValues, Tuple, float]]:
+        """(name suffix, label values, extra label pair, value) per sample."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self.samples():
+            pairs = list(zip(self.labelnames, values))
+            if extra:
+                pairs.append(extra)
+            labels = ",".join(f'{name}="{escape(str(v))}"' for name, v in pairs)
+            labels = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield "", labels, (), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (the last one is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self._buckets) + 1), 0.0]
+        state[0][bisect_left(self._buckets, value)] += 1
+        state[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", labels, ("le", format_value(bound)), cumulative
+            yield "_sum", labels, (), total
+            yield "_count", labels, (), cumulative
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = Registry()
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and response status.",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, until the response is sent.",
+    ("method", "route"),
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being served, by route template.",
+    ("method", "route"),
+)
+db_queries = Counter(
+    "db_queries_total",
+    "SQL statements executed, by database file and statement type.",
+    ("database", "statement"),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time, by database file and statement type.",
+    ("database", "statement"),
+    buckets=QUERY_BUCKETS,
+)
+usd_to_uah_fetch_duration = Histogram(
+    "usd_to_uah_fetch_duration_seconds",
+    "Time spent fetching the current USD/UAH rate upstream, by outcome.",
+    ("outcome",),
+)
+cache_requests = Counter(
+    "cache_requests_total",
+    "Lookups in in-process caches, by cache and result (hit, stale, miss).",
+    ("cache", "result"),
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, latency and concurrency of HTTP
+    requests, labelled with the matched route template rather than the raw
+    path to keep the number of series bounded."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec(method, route)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(elapsed, method, route)
+
+
+def route_template(scope) -> str:
+    """Template of the route that will serve the request, resolved up front.
+
+    The router only stores the matched route in the scope once the request
+    reaches it, which is too late to label the in-progress gauge.
+    """
+    partial = "<unmatched>"
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial == "<unmatched>":
+            # The router answers the first partial match (wrong method) with 405.
+            partial = route.path
+    return partial
+
+
+STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count and time every statement executed through `engine`."""
+    database = Path(engine.url.database or "memory").name
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        kind = statement.lstrip()[:6].upper()
+        kind = kind if kind in STATEMENT_TYPES else "OTHER"
+        db_queries.inc(database, kind)
+        db_query_duration.observe(elapsed, database, kind)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def discard_failed_query(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
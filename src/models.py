@@ -1,10 +1,75 @@
-from decimal import Decimal
-from typing import Text
-from sqlalchemy import Numeric, String, Date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Optional, Union
+from sqlalchemy import Date, Index, Integer, LargeBinary, Numeric, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.types import TypeDecorator
 from datetime import date
 
-from uuid import uuid4
+from uuid import UUID, uuid4
+
+CENT = Decimal("0.01")
+
+
+def quantize_cents(value: Decimal) -> Decimal:
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class UUIDBytes(TypeDecorator):
+    """UUID string at the ORM level, stored as a 16-byte BLOB.
+
+    Only canonical UUID strings are packed; any other id is stored as TEXT in
+    the same column, so legacy ids round-trip unchanged.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def bind_processor(self, dialect: Any):
+        # Bind bytes and text as is: the BLOB impl would wrap every value in
+        # the DBAPI Binary, which rejects the text ids.
+        def process(value: Optional[str]) -> Union[bytes, str, None]:
+            return self.process_bind_param(value, dialect)
+
+        return process
+
+    def process_bind_param(
+        self, value: Optional[str], dialect: Any
+    ) -> Union[bytes, str, None]:
+        if value is None:
+            return None
+        try:
+            uuid = UUID(value)
+        except ValueError:
+            return value
+        return uuid.bytes if str(uuid) == value else value
+
+    def process_result_value(
+        self, value: Union[bytes, str, None], dialect: Any
+    ) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        if len(value) == 16:
+            # Same as str(UUID(bytes=value)), without building a UUID per row.
+            h = value.hex()
+            return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        return value.decode()
+
+
+class Cents(TypeDecorator):
+    """Decimal amount at the ORM level, stored as integer minor units."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[int]:
+        if value is None:
+            return None
+        return int(quantize_cents(value).scaleb(2))
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[Decimal]:
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-2)
 
 
 class Base(DeclarativeBase):
@@ -13,16 +78,47 @@ class Base(DeclarativeBase):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index(
+            "ix_expenses_telegram_user_id_expense_date_id",
+            "telegram_user_id",
+            "expense_date",
+            "id",
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
-        String(255), primary_key=True, default=lambda: str(uuid4())
+        UUIDBytes, primary_key=True, default=lambda: str(uuid4())
     )
     telegram_user_id: Mapped[str] = mapped_column(String(255), nullable=False)
 
-    amount_in_uah: Mapped[Decimal] = mapped_column(Numeric(10, 2))
-    amount_in_usd: Mapped[Decimal] = mapped_column(Numeric(10, 2))
-    description: Mapped[str] = mapped_column(Text(255))
+    amount_in_uah: Mapped[Decimal] = mapped_column(Cents)
+    amount_in_usd: Mapped[Decimal] = mapped_column(Cents)
+    description: Mapped[str] = mapped_column(Text)
     expense_date: Mapped[date] = mapped_column(Date)
 
     def __repr__(self) -> str:
         return f"Expense(id={self.id}, uah={self.amount_in_uah}, usd={self.amount_in_usd}, date={self.expense_date.strftime("%d.%m.%Y")})"
+
+
+class ExchangeRate(Base):
+    __tablename__ = "exchange_rates"
+
+    pair: Mapped[str] = mapped_column(String(16), primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    rate: Mapped[Decimal] = mapped_column(Numeric(10, 4))
+
+    def __repr__(self) -> str:
+        return f"ExchangeRate(pair={self.pair}, date={self.date.strftime("%d.%m.%Y")}, rate={self.rate})"
+
+
+class ExpenseVersion(Base):
+    """Per-user counter bumped by every expense write, to validate caches."""
+
+    __tablename__ = "expense_versions"
+
+    telegram_user_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        return f"ExpenseVersion(telegram_user_id={self.telegram_user_id}, version={self.version})"
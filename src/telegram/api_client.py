@@ -0,0 +1,168 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from src.config import Settings
+from src.expenses.service import ExpensesServiceError
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExpensesAPIClient:
+    """HTTP transport of ExpensesService: a long-lived, pooled API client.
+
+    One instance is created per bot process and shares a keep-alive connection
+    pool between all handlers. Idempotent requests are retried with
+    exponential backoff on connection errors, timeouts and 5xx responses;
+    non-idempotent ones only when the connection could not be established.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connection_limit: int = 100,
+        keepalive_timeout: float = 30,
+        timeout: float = 10,
+        connect_timeout: float = 3,
+        retries: int = 2,
+        retry_backoff: float = 0.2,
+    ) -> None:
+        self._base_url = base_url
+        self._connection_limit = connection_limit
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ExpensesAPIClient":
+        return cls(
+            base_url=settings.API_BASE_URL,
+            connection_limit=settings.API_CONNECTION_LIMIT,
+            keepalive_timeout=settings.API_KEEPALIVE_TIMEOUT,
+            timeout=settings.API_TIMEOUT,
+            connect_timeout=settings.API_CONNECT_TIMEOUT,
+            retries=settings.API_RETRIES,
+            retry_backoff=settings.API_RETRY_BACKOFF,
+        )
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                base_url=self._base_url,
+                connector=aiohttp.TCPConnector(
+                    limit=self._connection_limit,
+                    keepalive_timeout=self._keepalive_timeout,
+                ),
+                timeout=self._timeout,
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def create_expense(self, payload: Dict) -> Dict:
+        return await self._request("POST", "/expense", json=payload, idempotent=False)
+
+    async def update_expense(self, payload: Dict) -> Dict:
+        return await self._request("PUT", "/expense", json=payload)
+
+    async def get_expense(self, expense_id: str, telegram_user_id: str) -> Dict:
+        return await self._request(
+            "GET",
+            f"/expense/{expense_id}",
+            params={"telegram_user_id": telegram_user_id},
+        )
+
+    async def delete_expense(
+        self, expense_id: str, telegram_user_id: Optional[str] = None
+    ) -> Dict:
+        params = {"telegram_user_id": telegram_user_id} if telegram_user_id else None
+        return await self._request("DELETE", f"/expense/{expense_id}", params=params)
+
+    async def list_expenses(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Dict]:
+        """Collect every page of expenses by following the API's next_cursor."""
+        params = {"expense_telegram_user_id": telegram_user_id}
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+
+        expenses: List[Dict] = []
+        while True:
+            page = await self._request("GET", "/expenses", params=params)
+            expenses.extend(page["items"])
+            if not page["next_cursor"]:
+                return expenses
+            params["cursor"] = page["next_cursor"]
+
+    async def list_expenses_page(
+        self,
+        telegram_user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = False,
+    ) -> Dict:
+        params = {
+            "expense_telegram_user_id": telegram_user_id,
+            "limit": limit,
+            "order": "desc" if descending else "asc",
+        }
+        if cursor:
+            params["cursor"] = cursor
+        return await self._request("GET", "/expenses", params=params)
+
+    async def get_expenses_version(self, telegram_user_id: str) -> int:
+        result = await self._request(
+            "GET",
+            "/expenses/version",
+            params={"expense_telegram_user_id": telegram_user_id},
+        )
+        return result["version"]
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict] = None,
+        json: Optional[Any] = None,
+        idempotent: bool = True,
+    ) -> Any:
+        if self._session is None:
+            await self.start()
+
+        for attempt in range(self._retries + 1):
+            can_retry = attempt < self._retries
+            try:
+                async with self._session.request(  # type: ignore
+                    method, path, params=params, json=json
+                ) as response:
+                    if response.status >= 500 and idempotent and can_retry:
+                        logger.warning(
+                            f"{method} {path} -> {response.status}, retrying"
+                        )
+                    elif response.status >= 400:
+                        raise ExpensesServiceError(
+                            response.status, await response.text()
+                        )
+                    else:
+                        return await response.json()
+            except aiohttp.ClientConnectorError:
+                if not can_retry:
+                    raise
+                logger.warning(f"{method} {path} could not connect, retrying")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not (idempotent and can_retry):
+                    raise
+                logger.warning(f"{method} {path} failed, retrying")
+
+            await asyncio.sleep(self._retry_backoff * 2**attempt)
@@ -1,3 +1,6 @@
+from typing import Dict, List
+
+from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 actions = InlineKeyboardMarkup(
@@ -8,3 +11,67 @@ actions = InlineKeyboardMarkup(
         [InlineKeyboardButton(text="Get Report", callback_data="report")],
     ]
 )
+
+
+# Callback data is limited to 64 bytes, so buttons carry only the action, the
+# page number and the expense's index on that page. Expense ids (legacy ones
+# can be long) and page cursors are kept in the FSM state.
+class PickExpense(CallbackData, prefix="pick"):
+    action: str
+    page: int
+    index: int
+
+
+class PickerPage(CallbackData, prefix="pickpage"):
+    action: str
+    page: int
+
+
+PICKER_DESCRIPTION_LENGTH = 24
+
+
+def expense_picker(
+    expenses: List[Dict], action: str, page: int, has_next: bool
+) -> InlineKeyboardMarkup:
+    """One button per expense, then Newer/Older navigation and Cancel."""
+    rows = []
+    for index, expense in enumerate(expenses):
+        description = expense["description"] or ""
+        if len(description) > PICKER_DESCRIPTION_LENGTH:
+            description = description[: PICKER_DESCRIPTION_LENGTH - 1] + "…"
+
+        text = f"{expense['expense_date']} · {expense['amount_in_uah']} UAH"
+        if description:
+            text += f" · {description}"
+
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text=text,
+                    callback_data=PickExpense(
+                        action=action, page=page, index=index
+                    ).pack(),
+                )
+            ]
+        )
+
+    navigation = []
+    if page > 0:
+        navigation.append(
+            InlineKeyboardButton(
+                text="« Newer",
+                callback_data=PickerPage(action=action, page=page - 1).pack(),
+            )
+        )
+    if has_next:
+        navigation.append(
+            InlineKeyboardButton(
+                text="Older »",
+                callback_data=PickerPage(action=action, page=page + 1).pack(),
+            )
+        )
+    if navigation:
+        rows.append(navigation)
+
+    rows.append([InlineKeyboardButton(text="Cancel", callback_data="picker_cancel")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
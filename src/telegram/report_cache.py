@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from src.config import Settings
+from src.metrics import cache_requests
+
+FILE_ID_SUFFIX = ".file_id"
+
+
+class CachedReport(NamedTuple):
+    path: Path
+    # Telegram's id of the uploaded file, if it has been sent before
+    file_id: Optional[str]
+
+
+class ReportCache:
+    """XLSX reports on disk, keyed by (user, date range, expenses version).
+
+    Any write to a user's expenses bumps their version, so a cached report is
+    valid for as long as its version is current; reports of older versions
+    are removed when a newer one is stored. Files expire `max_age` seconds
+    after their last use, and the least recently used ones are evicted once
+    the cache outgrows `max_bytes`. The Telegram file_id of a sent report is
+    kept next to it, so a cache hit is resent by id without an upload.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, max_age: float) -> None:
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ReportCache":
+        return cls(
+            settings.PROJECT_ROOT / "expenses_data",
+            max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+            max_age=settings.REPORT_CACHE_MAX_AGE,
+        )
+
+    def path_for(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        version: int,
+    ) -> Path:
+        name = f"{start_date or 'start'}_{end_date or 'now'}_v{version}.xlsx"
+        return self._directory / telegram_user_id / name
+
+    async def get(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        version: int,
+    ) -> Optional[CachedReport]:
+        path = self.path_for(telegram_user_id, start_date, end_date, version)
+        cached = await asyncio.to_thread(self._get, path)
+        cache_requests.inc("reports", "hit" if cached else "miss")
+        return cached
+
+    async def put(
+        self,
+        telegram_user_id: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        version: int,
+        content: bytes,
+    ) -> Path:
+        path = self.path_for(telegram_user_id, start_date, end_date, version)
+        await asyncio.to_thread(self._put, path, version, content)
+        return path
+
+    async def set_file_id(self, path: Path, file_id: str) -> None:
+        await asyncio.to_thread(file_id_path(path).write_text, file_id)
+
+    def _get(self, path: Path) -> Optional[CachedReport]:
+        try:
+            if time.time() - path.stat().st_mtime > self._max_age:
+                return None
+            # The modification time doubles as the last-use time for eviction.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            file_id = file_id_path(path).read_text() or None
+        except FileNotFoundError:
+            file_id = None
+        return CachedReport(path, file_id)
+
+    def _put(self, path: Path, version: int, content: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+
+        for report in path.parent.glob("*.xlsx"):
+            if report_version(report) < version:
+                remove_report(report)
+
+        self._evict(keep=path)
+
+    def _evict(self, keep: Path) -> None:
+        now = time.time()
+        reports = []
+        for report in self._directory.glob("*/*.xlsx"):
+            if report == keep:
+                continue
+            try:
+                stat = report.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self._max_age:
+                remove_report(report)
+            else:
+                reports.append((stat.st_mtime, stat.st_size, report))
+
+        total = keep.stat().st_size + sum(size for _, size, _ in reports)
+        for _, size, report in sorted(reports, key=lambda entry: entry[0]):
+            if total <= self._max_bytes:
+                break
+            remove_report(report)
+            total -= size
+
+
+def file_id_path(path: Path) -> Path:
+    return path.with_name(path.name + FILE_ID_SUFFIX)
+
+
+def report_version(path: Path) -> int:
+    try:
+        return int(path.stem.rsplit("_v", 1)[1])
+    except (IndexError, ValueError):
+        return -1
+
+
+def remove_report(path: Path) -> None:
+    for file in (path, file_id_path(path)):
+        try:
+            file.unlink()
+        except FileNotFoundError:
+            pass
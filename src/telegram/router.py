@@ -4,12 +4,15 @@ from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
+import asyncio
 from datetime import datetime
-import aiohttp
+from typing import Optional
 
 from src.config import get_settings
-from src.telegram.keyboards import actions
-from src.telegram.utils import create_excel
+from src.expenses.service import ExpensesService, ExpensesServiceError
+from src.telegram.keyboards import PickExpense, PickerPage, actions, expense_picker
+from src.telegram.report_cache import ReportCache
+from src.telegram.utils import build_excel, report_filename
 from src.telegram.validators import validate_amount, validate_date
 
 
@@ -85,7 +88,9 @@ async def new_expense_sum(message: Message, state: FSMContext):
 
 
 @router.message(AddExpense.amount)
-async def new_expense_amount(message: Message, state: FSMContext):
+async def new_expense_amount(
+    message: Message, state: FSMContext, expenses_service: ExpensesService
+):
     message_amount = message.text or ""
     if not validate_amount(message_amount):
         await message.answer("Invalid amount! Please enter a valid decimal number.")
@@ -101,21 +106,15 @@ async def new_expense_amount(message: Message, state: FSMContext):
         "expense_date": data.get("date", ""),
     }
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                "http://localhost:8000/expense", json=payload
-            ) as response:
-                if response.status == 201:
-                    await message.answer(f"Expense added successfully!")
-                else:
-                    await message.answer(
-                        f"Failed to add expense. Error: {response.status}"
-                    )
-        except Exception as e:
-            await message.answer(
-                f"An error occurred while sending the expense data: {str(e)}"
-            )
+    try:
+        await expenses_service.create_expense(payload)
+        await message.answer(f"Expense added successfully!")
+    except ExpensesServiceError as e:
+        await message.answer(f"Failed to add expense. Error: {e.status}")
+    except Exception as e:
+        await message.answer(
+            f"An error occurred while sending the expense data: {str(e)}"
+        )
 
     await state.clear()
 
@@ -158,7 +157,12 @@ async def get_expenses_end_date(message: Message, state: FSMContext):
 
 
 @router.message(DateRange.end_date)
-async def get_expenses_data(message: Message, state: FSMContext):
+async def get_expenses_data(
+    message: Message,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+    report_cache: ReportCache,
+):
     end_date = message.text or ""
     if not validate_date(end_date):
         await message.answer(
@@ -179,45 +183,50 @@ async def get_expenses_data(message: Message, state: FSMContext):
     start_date = data.get("start_date", "")
     telegram_user_id = str(message.from_user.id)  # type: ignore
 
-    params = {
-        "expense_telegram_user_id": telegram_user_id,
-        "start_date": start_date,
-        "end_date": formatted_end_date,
-    }
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                "http://localhost:8000/expenses", params=params
-            ) as response:
-                if response.status == 200:
-                    expenses = await response.json()
-                    if expenses:
-                        save_path = (
-                            settings.PROJECT_ROOT / "expenses_data" / telegram_user_id
-                        )
-                        save_path.mkdir(parents=True, exist_ok=True)
-
-                        file_path = create_excel(
-                            expenses, save_path, start_date, end_date
-                        )
-                        input_file = FSInputFile(file_path)
-                        await message.answer_document(
-                            document=input_file,
-                            caption="Here is generated report.",
-                        )
-                    else:
-                        await message.answer(
-                            f"No expenses found for the specified date range."
-                        )
-                else:
-                    await message.answer(
-                        f"Failed to retrieve expenses. Error: {response.status}"
-                    )
-        except Exception as e:
-            await message.answer(
-                f"An error occurred while processing the request: {str(e)}"
+    try:
+        version = await expenses_service.get_expenses_version(telegram_user_id)
+        cached = await report_cache.get(
+            telegram_user_id, start_date, formatted_end_date, version
+        )
+        if cached and cached.file_id:
+            # Already uploaded: Telegram resends it by id.
+            await message.answer_document(
+                document=cached.file_id,
+                caption="Here is generated report.",
             )
+        else:
+            path = cached.path if cached else None
+            if path is None:
+                expenses = await expenses_service.list_expenses(
+                    telegram_user_id, start_date=start_date, end_date=formatted_end_date
+                )
+                if expenses:
+                    content = await asyncio.to_thread(build_excel, expenses)
+                    path = await report_cache.put(
+                        telegram_user_id,
+                        start_date,
+                        formatted_end_date,
+                        version,
+                        content,
+                    )
+
+            if path is not None:
+                sent = await message.answer_document(
+                    document=FSInputFile(
+                        path, filename=report_filename(start_date, end_date)
+                    ),
+                    caption="Here is generated report.",
+                )
+                if sent.document:
+                    await report_cache.set_file_id(path, sent.document.file_id)
+            else:
+                await message.answer(f"No expenses found for the specified date range.")
+    except ExpensesServiceError as e:
+        await message.answer(f"Failed to retrieve expenses. Error: {e.status}")
+    except Exception as e:
+        await message.answer(
+            f"An error occurred while processing the request: {str(e)}"
+        )
 
     await state.clear()
 
@@ -228,72 +237,42 @@ async def get_expenses_data(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data == "delete_expense")
-async def delete_expense(callback: CallbackQuery, state: FSMContext):
-    await state.set_state(DeleteExpense.expense_id)
-
+async def delete_expense(
+    callback: CallbackQuery, state: FSMContext, expenses_service: ExpensesService
+):
     await callback.answer()
-    await callback.message.answer("Fetching your expenses...")  # type: ignore
-
-    telegram_user_id = str(callback.from_user.id)  # type: ignore
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"http://localhost:8000/expenses?expense_telegram_user_id={telegram_user_id}"
-            ) as response:
-                if response.status == 200:
-                    expenses = await response.json()
-                    if expenses:
-                        save_path = (
-                            settings.PROJECT_ROOT / "expenses_data" / telegram_user_id
-                        )
-                        save_path.mkdir(parents=True, exist_ok=True)
-
-                        file_path = create_excel(expenses, save_path, None, None)
-                        input_file = FSInputFile(file_path)
-                        await callback.message.answer_document(  # type: ignore
-                            document=input_file,
-                            caption="Here is generated report.",
-                        )
-                    else:
-                        await callback.message.answer("You don't have any expenses.")
-                else:
-                    await callback.message.answer(
-                        f"Failed to fetch your expenses. Error: {response.status}"
-                    )
-        except Exception as e:
-            await callback.message.answer(
-                f"An error occurred while fetching your expenses: {str(e)}"
-            )
-
     await state.set_state(DeleteExpense.expense_id)
-    await callback.message.answer("Enter exense_id you want to delete.")  # type: ignore
+
+    await show_expense_picker(
+        callback.message,  # type: ignore
+        state,
+        expenses_service,
+        str(callback.from_user.id),
+        action="delete",
+    )
 
 
 @router.message(DeleteExpense.expense_id)
-async def delete_expense_by_id(message: Message, state: FSMContext):
+async def delete_expense_by_id(
+    message: Message, state: FSMContext, expenses_service: ExpensesService
+):
     expense_id = message.text.strip()
 
     if not expense_id:
         await message.answer("Please provide a valid expense ID.")
         return
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.delete(
-                f"http://localhost:8000/expense/{expense_id}"
-            ) as response:
-                if response.status == 200:
-                    await message.answer(
-                        f"Expense with ID {expense_id} has been successfully deleted."
-                    )
-                else:
-                    await message.answer(
-                        f"Failed to delete expense. Error: {response.status}"
-                    )
-        except Exception as e:
-            await message.answer(
-                f"An error occurred while deleting the expense: {str(e)}"
-            )
+    try:
+        await expenses_service.delete_expense(
+            expense_id, str(message.from_user.id)  # type: ignore
+        )
+        await message.answer(
+            f"Expense with ID {expense_id} has been successfully deleted."
+        )
+    except ExpensesServiceError as e:
+        await message.answer(f"Failed to delete expense. Error: {e.status}")
+    except Exception as e:
+        await message.answer(f"An error occurred while deleting the expense: {str(e)}")
 
     await state.clear()
 
@@ -304,90 +283,69 @@ async def delete_expense_by_id(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data == "edit_expense")
-async def update_expense(callback: CallbackQuery, state: FSMContext):
+async def update_expense(
+    callback: CallbackQuery, state: FSMContext, expenses_service: ExpensesService
+):
     await callback.answer()
-    await callback.message.answer("Fetching your expenses...")  # type: ignore
-
-    telegram_user_id = str(callback.from_user.id)  # type: ignore
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"http://localhost:8000/expenses?expense_telegram_user_id={telegram_user_id}"
-            ) as response:
-                if response.status == 200:
-                    expenses = await response.json()
-                    if expenses:
-                        save_path = (
-                            settings.PROJECT_ROOT / "expenses_data" / telegram_user_id
-                        )
-                        save_path.mkdir(parents=True, exist_ok=True)
-
-                        file_path = create_excel(expenses, save_path, None, None)
-                        input_file = FSInputFile(file_path)
-                        await callback.message.answer_document(  # type: ignore
-                            document=input_file,
-                            caption="Here is generated report of your expenses.",
-                        )
-                    else:
-                        await callback.message.answer("You don't have any expenses.")
-                else:
-                    await callback.message.answer(
-                        f"Failed to fetch your expenses. Error: {response.status}"
-                    )
-        except Exception as e:
-            await callback.message.answer(
-                f"An error occurred while fetching your expenses: {str(e)}"
-            )
-
     await state.set_state(UpdateExpense.expense_id)
-    await callback.message.answer("Enter the expense ID of the expense you want to update.")  # type: ignore
+
+    await show_expense_picker(
+        callback.message,  # type: ignore
+        state,
+        expenses_service,
+        str(callback.from_user.id),
+        action="edit",
+    )
 
 
 @router.message(UpdateExpense.expense_id)
-async def update_expense_by_id(message: Message, state: FSMContext):
+async def update_expense_by_id(
+    message: Message, state: FSMContext, expenses_service: ExpensesService
+):
     expense_id = message.text.strip()
 
     if not expense_id:
         await message.answer("Please provide a valid expense ID.")
         return
 
-    telegram_user_id = str(message.from_user.id)  # type: ignore
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"http://localhost:8000/expenses?expense_telegram_user_id={telegram_user_id}"
-            ) as response:
-                if response.status == 200:
-                    expenses = await response.json()
-                    expense = next(
-                        (exp for exp in expenses if exp["id"] == expense_id), None
-                    )
-                    if expense:
-                        await state.update_data(expense_id=expense_id)
-
-                        expense_details = (
-                            f"Expense ID: {expense['id']}\n"
-                            f"Title: {expense['description']}\n"
-                            f"Amount: {expense['amount_in_uah']} UAH\n"
-                            f"Amount in USD: {expense['amount_in_usd']} USD\n"
-                            f"Date: {expense['expense_date']}"
-                        )
-                        await message.answer(
-                            f"Current expense details:\n{expense_details}\n"
-                        )
-
-                        await message.answer(f"Enter new title for the expense (Current: {expense['description']}):")  # type: ignore
-                        await state.set_state(UpdateExpense.title)
-                    else:
-                        await message.answer(f"No expense found with ID {expense_id}.")
-                else:
-                    await message.answer(
-                        f"Failed to fetch your expenses. Error: {response.status}"
-                    )
-        except Exception as e:
-            await message.answer(
-                f"An error occurred while fetching your expenses: {str(e)}"
-            )
+    await show_expense_for_update(
+        message,
+        state,
+        expenses_service,
+        expense_id,
+        str(message.from_user.id),  # type: ignore
+    )
+
+
+async def show_expense_for_update(
+    message: Message,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+    expense_id: str,
+    telegram_user_id: str,
+):
+    try:
+        expense = await expenses_service.get_expense(expense_id, telegram_user_id)
+        await state.update_data(expense_id=expense_id)
+
+        expense_details = (
+            f"Expense ID: {expense['id']}\n"
+            f"Title: {expense['description']}\n"
+            f"Amount: {expense['amount_in_uah']} UAH\n"
+            f"Amount in USD: {expense['amount_in_usd']} USD\n"
+            f"Date: {expense['expense_date']}"
+        )
+        await message.answer(f"Current expense details:\n{expense_details}\n")
+
+        await message.answer(f"Enter new title for the expense (Current: {expense['description']}):")  # type: ignore
+        await state.set_state(UpdateExpense.title)
+    except ExpensesServiceError as e:
+        if e.status == 404:
+            await message.answer(f"No expense found with ID {expense_id}.")
+        else:
+            await message.answer(f"Failed to fetch the expense. Error: {e.status}")
+    except Exception as e:
+        await message.answer(f"An error occurred while fetching the expense: {str(e)}")
 
 
 @router.message(UpdateExpense.title)
@@ -405,7 +363,9 @@ async def update_expense_title(message: Message, state: FSMContext):
 
 
 @router.message(UpdateExpense.amount)
-async def update_expense_amount(message: Message, state: FSMContext):
+async def update_expense_amount(
+    message: Message, state: FSMContext, expenses_service: ExpensesService
+):
     new_amount = message.text.strip()
 
     if not validate_amount(new_amount):
@@ -422,24 +382,190 @@ async def update_expense_amount(message: Message, state: FSMContext):
         "id": data["expense_id"],
     }
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.put(
-                "http://localhost:8000/expense", json=payload
-            ) as response:
-                if response.status == 200:
-                    await message.answer(
-                        f"Expense with ID {data['expense_id']} has been successfully updated."
-                    )
-                else:
-                    await message.answer(
-                        f"Failed to update expense. Error: {response.status}"
-                    )
-        except Exception as e:
-            await message.answer(f"An error occurred while updating the expense: {e}")
+    try:
+        await expenses_service.update_expense(payload)
+        await message.answer(
+            f"Expense with ID {data['expense_id']} has been successfully updated."
+        )
+    except ExpensesServiceError as e:
+        await message.answer(f"Failed to update expense. Error: {e.status}")
+    except Exception as e:
+        await message.answer(f"An error occurred while updating the expense: {e}")
 
     await state.clear()
     await message.answer(
         "Operation complete. Choose an action:",
         reply_markup=actions,
     )
+
+
+async def show_expense_picker(
+    message: Message,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+    telegram_user_id: str,
+    action: str,
+    page: int = 0,
+    edit: bool = False,
+):
+    """Send the picker with `page` of expenses, or with `edit` swap the keyboard
+    of the picker `message` in place.
+
+    Newest expenses come first. The cursor of every visited page is kept in
+    the FSM state, so paging back and forth fetches one page at a time.
+    """
+    cursors = [None]
+    if page:
+        cursors = (await state.get_data()).get("picker_cursors", cursors)
+        page = min(page, len(cursors) - 1)
+
+    try:
+        result = await expenses_service.list_expenses_page(
+            telegram_user_id,
+            settings.BOT_PICKER_PAGE_SIZE,
+            cursor=cursors[page],
+            descending=True,
+        )
+    except ExpensesServiceError as e:
+        await message.answer(f"Failed to fetch your expenses. Error: {e.status}")
+        return
+    except Exception as e:
+        await message.answer(
+            f"An error occurred while fetching your expenses: {str(e)}"
+        )
+        return
+
+    cursors = cursors[: page + 1]
+    if result["next_cursor"]:
+        cursors.append(result["next_cursor"])
+    await state.update_data(
+        picker_cursors=cursors,
+        picker_page=page,
+        picker_expense_ids=[expense["id"] for expense in result["items"]],
+    )
+
+    if not result["items"] and not page:
+        await state.clear()
+        await message.answer("You don't have any expenses.", reply_markup=actions)
+        return
+
+    keyboard = expense_picker(
+        result["items"], action, page, has_next=bool(result["next_cursor"])
+    )
+    if edit:
+        await message.edit_reply_markup(reply_markup=keyboard)
+    else:
+        await message.answer(
+            f"Choose the expense to {action}, or send its ID.", reply_markup=keyboard
+        )
+
+
+async def picked_expense_id(
+    state: FSMContext, callback_data: PickExpense
+) -> Optional[str]:
+    """Id of the expense behind a picker button, or None if the picker the
+    button belongs to is no longer the current one."""
+    data = await state.get_data()
+    if data.get("picker_page") != callback_data.page:
+        return None
+    expense_ids = data.get("picker_expense_ids", [])
+    if callback_data.index >= len(expense_ids):
+        return None
+    return expense_ids[callback_data.index]
+
+
+async def answer_outdated_picker(callback: CallbackQuery):
+    await callback.answer("This list is out of date.", show_alert=True)
+    await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore
+
+
+@router.callback_query(PickerPage.filter())
+async def change_picker_page(
+    callback: CallbackQuery,
+    callback_data: PickerPage,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+):
+    await callback.answer()
+    await show_expense_picker(
+        callback.message,  # type: ignore
+        state,
+        expenses_service,
+        str(callback.from_user.id),
+        action=callback_data.action,
+        page=callback_data.page,
+        edit=True,
+    )
+
+
+@router.callback_query(PickExpense.filter(F.action == "delete"))
+async def delete_picked_expense(
+    callback: CallbackQuery,
+    callback_data: PickExpense,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+):
+    expense_id = await picked_expense_id(state, callback_data)
+    if expense_id is None:
+        await answer_outdated_picker(callback)
+        return
+
+    await callback.answer()
+    await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore
+
+    try:
+        await expenses_service.delete_expense(expense_id, str(callback.from_user.id))
+        await callback.message.answer(  # type: ignore
+            f"Expense with ID {expense_id} has been successfully deleted."
+        )
+    except ExpensesServiceError as e:
+        await callback.message.answer(  # type: ignore
+            f"Failed to delete expense. Error: {e.status}"
+        )
+    except Exception as e:
+        await callback.message.answer(  # type: ignore
+            f"An error occurred while deleting the expense: {str(e)}"
+        )
+
+    await state.clear()
+
+    await callback.message.answer(  # type: ignore
+        "Operation complete. Choose an action:",
+        reply_markup=actions,
+    )
+
+
+@router.callback_query(PickExpense.filter(F.action == "edit"))
+async def update_picked_expense(
+    callback: CallbackQuery,
+    callback_data: PickExpense,
+    state: FSMContext,
+    expenses_service: ExpensesService,
+):
+    expense_id = await picked_expense_id(state, callback_data)
+    if expense_id is None:
+        await answer_outdated_picker(callback)
+        return
+
+    await callback.answer()
+    await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore
+
+    await show_expense_for_update(
+        callback.message,  # type: ignore
+        state,
+        expenses_service,
+        expense_id,
+        str(callback.from_user.id),
+    )
+
+
+@router.callback_query(F.data == "picker_cancel")
+async def cancel_picker(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore
+    await state.clear()
+
+    await callback.message.answer(  # type: ignore
+        "Operation cancelled. Choose an action:",
+        reply_markup=actions,
+    )
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+from sqlalchemy import (
+    Column,
+    Float,
+    MetaData,
+    String,
+    Table,
+    Text,
+    case,
+    delete,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import Settings
+from src.database import create_engine_from_settings
+from src.metrics import cache_requests
+
+# Bot conversation state lives in its own database file, outside the expense
+# schema and its migrations.
+metadata = MetaData()
+
+fsm_states = Table(
+    "fsm_states",
+    metadata,
+    Column("key", String, primary_key=True),
+    Column("state", String, nullable=True),
+    Column("data", Text, nullable=False, default="{}"),
+    Column("expires_at", Float, nullable=False, index=True),
+)
+
+EMPTY_DATA = "{}"
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage in SQLite, shareable by several bot processes.
+
+    A key's state and data expire `ttl` seconds after their last write, so
+    abandoned conversations are forgotten and periodically purged.
+
+    With a positive `cache_ttl`, reads are served from a small LRU cache for
+    that many seconds. A write updates the cached entry of its key if it is
+    still fresh and drops it otherwise. Writes from other processes are not
+    seen until the entry expires, so the cache is off by default and is only
+    meant for a single bot process.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        ttl: float,
+        cache_size: int = 1024,
+        cache_ttl: float = 0,
+        purge_interval: float = 60,
+        key_builder: Optional[KeyBuilder] = None,
+    ) -> None:
+        self._engine = engine
+        self._ttl = ttl
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._purge_interval = purge_interval
+        self._key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True, with_destiny=True
+        )
+
+        # storage key -> (cached until, state, data)
+        self._cache: OrderedDict[str, Tuple[float, Optional[str], Dict[str, Any]]] = (
+            OrderedDict()
+        )
+        self._setup_lock = asyncio.Lock()
+        self._ready = False
+        self._next_purge = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SQLiteStorage":
+        return cls(
+            create_engine_from_settings(settings, settings.ASYNC_SQLITE_FSM_URI),
+            ttl=settings.BOT_FSM_TTL,
+            cache_size=settings.BOT_FSM_CACHE_SIZE,
+            cache_ttl=settings.BOT_FSM_CACHE_TTL,
+        )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, state=state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._read(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(key, data=data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._read(key)
+        return data.copy()
+
+    async def close(self) -> None:
+        await self._engine.dispose()
+
+    async def _setup(self) -> None:
+        async with self._setup_lock:
+            if not self._ready:
+                async with self._engine.begin() as connection:
+                    await connection.run_sync(metadata.create_all)
+                self._ready = True
+
+    async def _read(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        storage_key = self._key_builder.build(key)
+
+        entry = self._cache.get(storage_key)
+        if entry and entry[0] > time.monotonic():
+            self._cache.move_to_end(storage_key)
+            cache_requests.inc("fsm_state", "hit")
+            return entry[1], entry[2]
+
+        cache_requests.inc("fsm_state", "miss")
+        if not self._ready:
+            await self._setup()
+        async with self._engine.connect() as connection:
+            result = await connection.execute(
+                select(fsm_states.c.state, fsm_states.c.data).filter(
+                    fsm_states.c.key == storage_key,
+                    fsm_states.c.expires_at > time.time(),
+                )
+            )
+            row = result.first()
+
+        state, data = (row.state, json.loads(row.data)) if row else (None, {})
+        self._remember(storage_key, state, data)
+        return state, data
+
+    async def _write(self, key: StorageKey, **values: Any) -> None:
+        storage_key = self._key_builder.build(key)
+        now = time.time()
+
+        columns = {
+            name: json.dumps(value) if name == "data" else value
+            for name, value in values.items()
+        }
+        stmt = insert(fsm_states).values(
+            key=storage_key, expires_at=now + self._ttl, **columns
+        )
+        # Only the written column is replaced; the other one is kept unless
+        # the row has already expired.
+        alive = fsm_states.c.expires_at > now
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[fsm_states.c.key],
+            set_={
+                "expires_at": stmt.excluded.expires_at,
+                "state": (
+                    stmt.excluded.state
+                    if "state" in values
+                    else case((alive, fsm_states.c.state), else_=None)
+                ),
+                "data": (
+                    stmt.excluded.data
+                    if "data" in values
+                    else case((alive, fsm_states.c.data), else_=EMPTY_DATA)
+                ),
+            },
+        )
+
+        if not self._ready:
+            await self._setup()
+        async with self._engine.begin() as connection:
+            await connection.execute(stmt)
+            if time.monotonic() >= self._next_purge:
+                await self._purge(connection, now)
+
+        entry = self._cache.get(storage_key)
+        if entry and entry[0] > time.monotonic():
+            state = values.get("state", entry[1])
+            data = values.get("data", entry[2])
+            self._remember(storage_key, state, data)
+        else:
+            self._cache.pop(storage_key, None)
+
+    async def _purge(self, connection: Any, now: float) -> None:
+        await connection.execute(
+            delete(fsm_states).filter(
+                or_(
+                    fsm_states.c.expires_at <= now,
+                    (fsm_states.c.state.is_(None)) & (fsm_states.c.data == EMPTY_DATA),
+                )
+            )
+        )
+        self._next_purge = time.monotonic() + self._purge_interval
+
+    def _remember(
+        self, storage_key: str, state: Optional[str], data: Dict[str, Any]
+    ) -> None:
+        if self._cache_size <= 0 or self._cache_ttl <= 0:
+            return
+
+        self._cache[storage_key] = (time.monotonic() + self._cache_ttl, state, data)
+        self._cache.move_to_end(storage_key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
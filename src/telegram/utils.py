@@ -1,34 +1,38 @@
-from pathlib import Path
+from io import BytesIO
 from typing import Dict, List, Optional
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
 
-def create_excel(
-    data: List[Dict],
-    save_path: Path,
-    date_start: Optional[str],
-    date_end: Optional[str],
-):
-    wb = Workbook()
-    ws = wb.active
+def build_excel(data: List[Dict]) -> bytes:
+    """Render expenses into an in-memory XLSX using openpyxl's write-only mode.
 
-    headers = list(data[0].keys())
-    ws.append(headers)
+    Column widths have to be known before the first row is written, so cell
+    values and widths are collected in a single pass over `data` first.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
 
+    headers = list(data[0].keys())
+    widths = [0] * len(headers)
+    rows = []
     for entry in data:
         row = [entry[key] for key in headers]
+        for col, value in enumerate(row):
+            widths[col] = max(widths[col], len(str(value)))
+        rows.append(row)
+
+    for col, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = width + 2
+
+    ws.append(headers)
+    for row in rows:
         ws.append(row)
 
-    for col in range(1, len(headers) + 1):
-        max_length = 0
-        column = get_column_letter(col)
-        for row in data:
-            value = str(row[headers[col - 1]])
-            max_length = max(max_length, len(value))
-        adjusted_width = max_length + 2
-        ws.column_dimensions[column].width = adjusted_width
-
-    file_path = save_path / f"expenses_{date_start or "All time"}-{date_end}.xlsx"
-    wb.save(file_path)
-    return file_path
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def report_filename(date_start: Optional[str], date_end: Optional[str]) -> str:
+    return f"expenses_{date_start or "All time"}-{date_end or "now"}.xlsx"
@@ -0,0 +1,143 @@
+import asyncio
+import hmac
+from typing import Dict, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+from src.config import Settings
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class TelegramWebhook:
+    """Feeds Telegram webhook requests to the dispatcher inside the API app.
+
+    Every request must carry the secret token registered with Telegram.
+    Updates are acknowledged as soon as they are accepted and processed in
+    the background, at most `max_concurrency` at a time; further requests
+    wait for a free slot, which pushes back on Telegram instead of piling up
+    tasks. If the webhook cannot be registered, the bot is served by polling
+    from the same process instead.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: str,
+        url: str = "",
+        max_concurrency: int = 100,
+    ) -> None:
+        if not secret_token:
+            raise ValueError("Webhook mode requires a secret token")
+
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self._secret_token = secret_token
+        self._url = url
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._polling: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "TelegramWebhook":
+        # Imported here so the API only loads the bot when webhook mode is on.
+        from src.bot import create_bot, create_dispatcher
+
+        url = ""
+        if settings.BOT_WEBHOOK_URL:
+            url = settings.BOT_WEBHOOK_URL.rstrip("/") + settings.BOT_WEBHOOK_PATH
+
+        return cls(
+            create_dispatcher(),
+            create_bot(),
+            secret_token=settings.BOT_WEBHOOK_SECRET,
+            url=url,
+            max_concurrency=settings.BOT_WEBHOOK_MAX_CONCURRENCY,
+        )
+
+    @property
+    def polling(self) -> bool:
+        return self._polling is not None
+
+    async def start(self) -> None:
+        if await self._set_webhook():
+            await self.dispatcher.emit_startup(bot=self.bot)
+            return
+
+        try:
+            await self.bot.delete_webhook()
+        except Exception as e:
+            logger.warning(f"Could not delete the webhook: {e}")
+
+        # start_polling emits the dispatcher startup/shutdown events itself.
+        self._polling = asyncio.create_task(
+            self.dispatcher.start_polling(
+                self.bot, handle_signals=False, close_bot_session=False
+            )
+        )
+
+    async def close(self) -> None:
+        if self._polling is not None:
+            try:
+                await self.dispatcher.stop_polling()
+            except RuntimeError:  # polling has not started or already failed
+                self._polling.cancel()
+            await asyncio.gather(self._polling, return_exceptions=True)
+            self._polling = None
+        else:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self.dispatcher.emit_shutdown(bot=self.bot)
+
+        await self.bot.session.close()
+
+    async def handle(self, request: Request) -> Dict:
+        secret_token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(secret_token, self._secret_token):
+            raise HTTPException(status_code=401, detail="Invalid secret token.")
+
+        try:
+            update = Update.model_validate(
+                await request.json(), context={"bot": self.bot}
+            )
+        except (ValueError, ValidationError):
+            raise HTTPException(status_code=400, detail="Invalid update.")
+
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return {"ok": True}
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+        except Exception:
+            logger.exception(f"Failed to process update {update.update_id}")
+        finally:
+            self._semaphore.release()
+
+    async def _set_webhook(self) -> bool:
+        if not self._url:
+            logger.warning("BOT_WEBHOOK_URL is not set, falling back to polling")
+            return False
+
+        try:
+            await self.bot.set_webhook(
+                self._url,
+                secret_token=self._secret_token,
+                allowed_updates=self.dispatcher.resolve_used_update_types(),
+            )
+        except Exception as e:
+            logger.warning(f"Could not set the webhook ({e}), falling back to polling")
+            return False
+
+        return True
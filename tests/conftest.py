@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import AsyncIterator, List, Tuple
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.api import app
+from src.database import shard_router
+from src.expenses import write_queue
+from src.expenses.rates import usd_to_uah_provider
+from src.models import Base
+
+STUB_RATE = 40.0
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def db_path(tmp_path) -> Path:
+    return tmp_path / "db.sqlite3"
+
+
+@pytest.fixture
+async def engine(db_path: Path) -> AsyncIterator[AsyncEngine]:
+    """Engine of a fresh expenses database with the current schema."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def statements(engine: AsyncEngine) -> List[Tuple[str, tuple]]:
+    """SQL statements executed on `engine` from now on, with their parameters."""
+    executed: List[Tuple[str, tuple]] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, tuple(parameters)))
+
+    return executed
+
+
+@pytest.fixture
+def stub_rate(monkeypatch) -> float:
+    """Serve a fixed USD/UAH rate instead of fetching it upstream."""
+    monkeypatch.setattr(
+        usd_to_uah_provider, "_fetcher", lambda: {"error": None, "result": STUB_RATE}
+    )
+    return STUB_RATE
+
+
+@pytest.fixture
+async def client(
+    engine: AsyncEngine,
+    session_factory: async_sessionmaker[AsyncSession],
+    stub_rate: float,
+    monkeypatch,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Client of the API app with its single shard on the test database and
+    writes applied directly, without coalescing."""
+    for prefix in ("", "write_"):
+        monkeypatch.setattr(shard_router, f"{prefix}engines", [engine])
+        monkeypatch.setattr(
+            shard_router, f"{prefix}session_factories", [session_factory]
+        )
+    monkeypatch.setattr(
+        write_queue,
+        "expense_writers",
+        [
+            write_queue.WriteCoalescer(
+                session_factory, window=0, max_batch=1, enabled=False
+            )
+        ],
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
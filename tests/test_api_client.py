@@ -0,0 +1,163 @@
+import asyncio
+import socket
+from typing import AsyncIterator, List
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.expenses.service import ExpensesServiceError
+from src.telegram import api_client
+from src.telegram.api_client import ExpensesAPIClient
+
+pytestmark = pytest.mark.anyio
+
+RETRIES = 2
+BACKOFF = 0.2
+TIMEOUT = 0.5
+
+
+class Upstream:
+    """API stub answering with the queued statuses in order, then 200."""
+
+    def __init__(self) -> None:
+        self.statuses: List[int] = []
+        self.delay = 0.0
+        self.calls = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else 200
+        return web.json_response({"version": self.calls}, status=status)
+
+
+class RecordingAsyncio:
+    """Stands in for `asyncio` in the client module to record backoff delays."""
+
+    def __init__(self) -> None:
+        self.delays: List[float] = []
+
+    def __getattr__(self, name: str):
+        return getattr(asyncio, name)
+
+    async def sleep(self, delay: float) -> None:
+        self.delays.append(delay)
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> List[float]:
+    """Backoff delays requested by the client; they are not actually waited."""
+    recorder = RecordingAsyncio()
+    monkeypatch.setattr(api_client, "asyncio", recorder)
+    return recorder.delays
+
+
+@pytest.fixture
+async def upstream() -> AsyncIterator[Upstream]:
+    stub = Upstream()
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    stub.url = str(server.make_url(""))
+    yield stub
+    await server.close()
+
+
+def make_client(base_url: str) -> ExpensesAPIClient:
+    return ExpensesAPIClient(
+        base_url, timeout=TIMEOUT, retries=RETRIES, retry_backoff=BACKOFF
+    )
+
+
+@pytest.fixture
+async def client(upstream) -> AsyncIterator[ExpensesAPIClient]:
+    client = make_client(upstream.url)
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+async def unreachable_client() -> AsyncIterator[ExpensesAPIClient]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # Nothing listens on the port once the socket is closed.
+    client = make_client(f"http://127.0.0.1:{port}")
+    yield client
+    await client.close()
+
+
+@pytest.mark.parametrize("status", [400, 404, 422])
+async def test_client_errors_are_not_retried(client, upstream, sleeps, status):
+    upstream.statuses = [status]
+
+    with pytest.raises(ExpensesServiceError) as error:
+        await client.get_expenses_version("42")
+
+    assert error.value.status == status
+    assert upstream.calls == 1
+    assert sleeps == []
+
+
+async def test_server_errors_are_retried_with_exponential_backoff(
+    client, upstream, sleeps
+):
+    upstream.statuses = [500, 503]
+
+    assert await client.get_expenses_version("42") == 3
+    assert sleeps == [BACKOFF, BACKOFF * 2]
+
+
+async def test_server_error_is_raised_once_retries_are_exhausted(
+    client, upstream, sleeps
+):
+    upstream.statuses = [503] * (RETRIES + 1)
+
+    with pytest.raises(ExpensesServiceError) as error:
+        await client.get_expenses_version("42")
+
+    assert error.value.status == 503
+    assert upstream.calls == RETRIES + 1
+
+
+async def test_server_errors_of_non_idempotent_requests_are_not_retried(
+    client, upstream, sleeps
+):
+    upstream.statuses = [502]
+
+    with pytest.raises(ExpensesServiceError):
+        await client.create_expense({"telegram_user_id": "42"})
+
+    assert upstream.calls == 1
+    assert sleeps == []
+
+
+async def test_timeouts_are_retried_for_idempotent_requests_only(
+    client, upstream, sleeps
+):
+    upstream.delay = TIMEOUT * 2
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.create_expense({"telegram_user_id": "42"})
+    assert upstream.calls == 1
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.get_expenses_version("42")
+    assert upstream.calls == 1 + RETRIES + 1
+
+
+@pytest.mark.parametrize("idempotent", [True, False])
+async def test_connection_errors_are_retried(unreachable_client, sleeps, idempotent):
+    request = (
+        unreachable_client.get_expenses_version("42")
+        if idempotent
+        else unreachable_client.create_expense({"telegram_user_id": "42"})
+    )
+
+    with pytest.raises(aiohttp.ClientConnectorError):
+        await request
+
+    assert sleeps == [BACKOFF, BACKOFF * 2]
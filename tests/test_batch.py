@@ -0,0 +1,97 @@
+from typing import AsyncIterator
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.config import get_settings
+from src.database import shard_router
+
+pytestmark = pytest.mark.anyio
+
+# Users on shard 0 and shard 1 of two
+USER, OTHER_SHARD_USER = "42", "1"
+
+
+def item(telegram_user_id: str = USER, **fields) -> dict:
+    return {
+        "telegram_user_id": telegram_user_id,
+        "amount_in_uah": "10",
+        "description": "coffee",
+        "expense_date": "2024-01-01",
+        **fields,
+    }
+
+
+@pytest.fixture
+async def broken_second_shard(
+    client, engine, session_factory, tmp_path, monkeypatch
+) -> AsyncIterator[None]:
+    """Route users to two shards, the second of which has no schema."""
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'broken.sqlite3'}")
+    session_factories = [session_factory, async_sessionmaker(bind=broken)]
+    for prefix in ("", "write_"):
+        monkeypatch.setattr(shard_router, f"{prefix}engines", [engine, broken])
+        monkeypatch.setattr(
+            shard_router, f"{prefix}session_factories", session_factories
+        )
+    assert shard_router.shard_for(USER) == 0
+    assert shard_router.shard_for(OTHER_SHARD_USER) == 1
+    yield
+    await broken.dispose()
+
+
+async def test_batch_reports_invalid_items_and_creates_the_rest(client):
+    response = await client.post(
+        "/expenses/batch",
+        json=[
+            item(description="first"),
+            item(amount_in_uah="not a number"),
+            item(description="third", expense_date="2024-02-30"),
+            item(description="fourth"),
+        ],
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [r["index"] for r in result["results"]] == [0, 1, 2, 3]
+    assert [r["expense"]["description"] for r in result["results"][::3]] == [
+        "first",
+        "fourth",
+    ]
+    assert result["results"][1]["error"].startswith("amount_in_uah")
+    assert result["results"][2]["error"].startswith("expense_date")
+    assert result["results"][1]["expense"] is None
+
+    listing = await client.get("/expenses", params={"expense_telegram_user_id": USER})
+    assert len(listing.json()["items"]) == 2
+
+
+async def test_failed_shard_only_fails_its_own_items(client, broken_second_shard):
+    response = await client.post(
+        "/expenses/batch",
+        json=[
+            item(),
+            item(OTHER_SHARD_USER),
+            item(),
+            item(description=None, amount_in_uah=None),
+        ],
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [r["expense"] is not None for r in result["results"]] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+    assert result["results"][1]["error"] == "Failed to store the expense"
+
+
+async def test_batch_size_is_limited(client):
+    size = get_settings().EXPENSES_MAX_CREATE_BATCH_SIZE
+    response = await client.post("/expenses/batch", json=[item()] * (size + 1))
+
+    assert response.status_code == 422
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator
+
+import pytest
+from sqlalchemy import event, func, select
+
+from src.config import Settings
+from src.database import ShardRouter
+from src.expenses import crud
+from src.models import Base, Expense
+
+pytestmark = pytest.mark.anyio
+
+USER = "42"
+
+
+@pytest.fixture
+async def production_router(tmp_path) -> AsyncIterator[ShardRouter]:
+    settings = Settings(
+        PROJECT_ROOT=tmp_path,
+        DB_PROFILE="production",
+        SQLITE_SHARD_COUNT=1,
+        METRICS_ENABLED=False,
+    )
+    router = ShardRouter.from_settings(settings)
+    async with router.write_engines[0].begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield router
+    await router.dispose()
+
+
+async def test_production_writes_begin_immediate_on_their_own_engine(
+    production_router,
+):
+    statements = []
+    event.listen(
+        production_router.write_engines[0].sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    async with production_router.write_session(USER) as session:
+        await crud.get_expenses_version(session, USER)
+
+    assert production_router.write_engines != production_router.engines
+    assert statements[0] == "BEGIN IMMEDIATE"
+
+
+async def test_concurrent_writers_queue_for_the_single_write_connection(
+    production_router,
+):
+    assert production_router.write_engines[0].pool.size() == 1
+
+    async def read_then_write() -> None:
+        async with production_router.write_session(USER) as session:
+            await crud.get_user_expenses_page(session, USER, 10)
+            await crud.create_expense(
+                session,
+                USER,
+                Decimal("10"),
+                "coffee",
+                date(2024, 1, 1),
+                fallback_rate=Decimal(40),
+            )
+
+    await asyncio.gather(*(read_then_write() for _ in range(20)))
+
+    async with production_router.session(USER) as session:
+        assert await session.scalar(select(func.count()).select_from(Expense)) == 20
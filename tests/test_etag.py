@@ -0,0 +1,110 @@
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+USER = "42"
+LIST_PARAMS = {"expense_telegram_user_id": USER}
+
+
+async def add_expense(client: httpx.AsyncClient) -> str:
+    response = await client.post(
+        "/expense",
+        json={
+            "telegram_user_id": USER,
+            "amount_in_uah": "10",
+            "description": "coffee",
+            "expense_date": "2024-01-01",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def update_expense(client: httpx.AsyncClient, expense_id: str) -> None:
+    response = await client.put(
+        "/expense",
+        json={
+            "id": expense_id,
+            "telegram_user_id": USER,
+            "amount_in_uah": "12",
+            "description": "tea",
+        },
+    )
+    assert response.status_code == 200
+
+
+async def delete_expense(client: httpx.AsyncClient, expense_id: str) -> None:
+    response = await client.delete(
+        f"/expense/{expense_id}", params={"telegram_user_id": USER}
+    )
+    assert response.status_code == 200
+
+
+async def add_another_expense(client: httpx.AsyncClient, expense_id: str) -> None:
+    await add_expense(client)
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [
+        pytest.param(lambda etag: etag, id="plain"),
+        pytest.param(lambda etag: f"W/{etag}", id="weak"),
+        pytest.param(lambda etag: f'"stale", {etag}', id="list"),
+        pytest.param(lambda etag: "*", id="any"),
+    ],
+)
+@pytest.mark.parametrize("path", ["/expenses", "/expenses/summary"])
+async def test_matching_etag_answers_304_without_reading_rows(
+    client, statements, path, if_none_match
+):
+    await add_expense(client)
+    etag = (await client.get(path, params=LIST_PARAMS)).headers["etag"]
+
+    statements.clear()
+    response = await client.get(
+        path, params=LIST_PARAMS, headers={"If-None-Match": if_none_match(etag)}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert statements and not any("FROM expenses" in s for s, _ in statements)
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        pytest.param(add_another_expense, id="create"),
+        pytest.param(update_expense, id="update"),
+        pytest.param(delete_expense, id="delete"),
+    ],
+)
+@pytest.mark.parametrize("path", ["/expenses", "/expenses/summary"])
+async def test_write_changes_the_etag(client, path, write):
+    expense_id = await add_expense(client)
+    before = await client.get(path, params=LIST_PARAMS)
+
+    await write(client, expense_id)
+    after = await client.get(
+        path, params=LIST_PARAMS, headers={"If-None-Match": before.headers["etag"]}
+    )
+
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.json() != before.json()
+
+
+async def test_listing_and_summary_have_distinct_etags(client):
+    await add_expense(client)
+    listing = await client.get("/expenses", params=LIST_PARAMS)
+    summary = await client.get(
+        "/expenses/summary",
+        params=LIST_PARAMS,
+        headers={"If-None-Match": listing.headers["etag"]},
+    )
+
+    assert summary.status_code == 200
+    assert summary.json()["count"] == 1
+    assert summary.headers["cache-control"] == listing.headers["cache-control"]
+    assert summary.headers["etag"] != listing.headers["etag"]
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, List
+
+import pytest
+
+from src.expenses import router
+from src.expenses.export import (
+    EXPORT_FIELDS,
+    EXPORT_MEDIA_TYPES,
+    iter_csv,
+    iter_ndjson,
+)
+from src.models import Expense
+
+pytestmark = pytest.mark.anyio
+
+USER = "42"
+
+
+def make_expenses(count: int) -> List[Expense]:
+    return [
+        Expense(
+            id=f"00000000-0000-0000-0000-{i:012d}",
+            telegram_user_id=USER,
+            amount_in_uah=Decimal("10.50"),
+            amount_in_usd=Decimal("0.26"),
+            description=f"expense {i}",
+            expense_date=date(2024, 1, 1) + timedelta(days=i),
+        )
+        for i in range(count)
+    ]
+
+
+async def stream(expenses: List[Expense]) -> AsyncIterator[Expense]:
+    for expense in expenses:
+        yield expense
+
+
+async def collect(chunks: AsyncIterator[bytes]) -> List[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.parametrize("count, chunks", [(0, 0), (1, 1), (4, 2), (5, 3)])
+async def test_ndjson_yields_one_chunk_per_batch(count, chunks):
+    result = await collect(iter_ndjson(stream(make_expenses(count)), chunk_size=2))
+
+    assert len(result) == chunks
+    assert all(chunk.endswith(b"\n") for chunk in result)
+    lines = b"".join(result).splitlines()
+    assert [json.loads(line)["description"] for line in lines] == [
+        f"expense {i}" for i in range(count)
+    ]
+
+
+async def test_csv_writes_header_once_and_one_chunk_per_batch():
+    result = await collect(iter_csv(stream(make_expenses(5)), chunk_size=2))
+
+    assert len(result) == 3
+    assert result[0].startswith(",".join(EXPORT_FIELDS).encode())
+    rows = list(csv.DictReader(io.StringIO(b"".join(result).decode())))
+    assert [row["description"] for row in rows] == [f"expense {i}" for i in range(5)]
+    assert rows[0]["amount_in_uah"] == "10.50"
+
+
+async def test_csv_of_no_expenses_is_just_the_header():
+    result = await collect(iter_csv(stream([]), chunk_size=2))
+
+    assert b"".join(result).decode().splitlines() == [",".join(EXPORT_FIELDS)]
+
+
+async def add_expenses(client, dates: List[str]) -> None:
+    response = await client.post(
+        "/expenses/batch",
+        json=[
+            {
+                "telegram_user_id": USER,
+                "amount_in_uah": "10",
+                "description": f"on {expense_date}",
+                "expense_date": expense_date,
+            }
+            for expense_date in dates
+        ],
+    )
+    assert response.json()["created"] == len(dates)
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+async def test_export_endpoint_streams_user_expenses_by_date(
+    client, monkeypatch, format
+):
+    monkeypatch.setattr(router.settings, "EXPENSES_EXPORT_BATCH_SIZE", 2)
+    await add_expenses(client, ["2024-03-01", "2024-01-01", "2024-02-01"])
+
+    response = await client.get(
+        "/expenses/export",
+        params={
+            "expense_telegram_user_id": USER,
+            "format": format,
+            "start_date": "2024-01-15",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(EXPORT_MEDIA_TYPES[format])
+    assert (
+        response.headers["content-disposition"]
+        == f'attachment; filename="expenses.{format}"'
+    )
+    if format == "ndjson":
+        rows = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["description"] for row in rows] == ["on 2024-02-01", "on 2024-03-01"]
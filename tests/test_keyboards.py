@@ -0,0 +1,63 @@
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.telegram.keyboards import PickExpense, expense_picker
+from src.telegram.router import picked_expense_id
+
+pytestmark = pytest.mark.anyio
+
+# Longer than a UUID; ids from before UUIDs were enforced can be any text.
+LEGACY_ID = "legacy-expense-" + "x" * 80
+
+
+def make_expense(expense_id: str) -> dict:
+    return {
+        "id": expense_id,
+        "expense_date": "2024-01-01",
+        "amount_in_uah": "10.00",
+        "description": "coffee",
+    }
+
+
+def picker_buttons(expense_ids, page=0):
+    keyboard = expense_picker(
+        [make_expense(expense_id) for expense_id in expense_ids],
+        "delete",
+        page,
+        has_next=True,
+    )
+    return [row[0] for row in keyboard.inline_keyboard[: len(expense_ids)]]
+
+
+def test_callback_data_fits_telegram_limit_for_long_ids():
+    for button in picker_buttons([LEGACY_ID, "2"], page=12345):
+        assert len(button.callback_data.encode()) <= 64
+
+
+@pytest.fixture
+def state() -> FSMContext:
+    return FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=1, user_id=1))
+
+
+async def test_picked_button_resolves_to_expense_on_shown_page(state):
+    await state.update_data(picker_page=1, picker_expense_ids=["1", LEGACY_ID])
+    button = picker_buttons(["1", LEGACY_ID], page=1)[1]
+
+    callback_data = PickExpense.unpack(button.callback_data)
+
+    assert await picked_expense_id(state, callback_data) == LEGACY_ID
+
+
+@pytest.mark.parametrize(
+    "callback_data",
+    [
+        PickExpense(action="delete", page=0, index=0),
+        PickExpense(action="delete", page=1, index=2),
+    ],
+)
+async def test_button_of_outdated_picker_resolves_to_nothing(state, callback_data):
+    await state.update_data(picker_page=1, picker_expense_ids=["1", "2"])
+
+    assert await picked_expense_id(state, callback_data) is None
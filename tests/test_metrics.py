@@ -0,0 +1,58 @@
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.api import app
+from src.database import shard_router
+from src.metrics import Metric, instrument_engine
+from src.models import Base
+
+
+@pytest.fixture
+def test_client(db_path, monkeypatch) -> TestClient:
+    """Synchronous client; every request runs in its own event loop, so the
+    engine does not keep connections between them."""
+    Base.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    instrument_engine(engine)
+    monkeypatch.setattr(shard_router, "engines", [engine])
+    monkeypatch.setattr(
+        shard_router, "session_factories", [async_sessionmaker(bind=engine)]
+    )
+    return TestClient(app)
+
+
+def sample(metrics: str, name: str, labels: str) -> float:
+    found = re.search(rf"^{name}{{{re.escape(labels)}}} (\S+)$", metrics, re.M)
+    assert found, f"{name}{{{labels}}} is not exported"
+    return float(found.group(1))
+
+
+def test_requests_are_labelled_with_route_template(test_client, db_path):
+    response = test_client.get("/expenses", params={"expense_telegram_user_id": "42"})
+    assert response.status_code == 200
+
+    metrics = test_client.get("/metrics").text
+
+    labels = 'method="GET",route="/expenses",status="200"'
+    assert sample(metrics, "http_requests_total", labels) >= 1
+    assert (
+        sample(metrics, "http_requests_in_progress", 'method="GET",route="/expenses"')
+        == 0
+    )
+    # The scrape itself is being served.
+    assert (
+        sample(metrics, "http_requests_in_progress", 'method="GET",route="/metrics"')
+        == 1
+    )
+    db_labels = f'database="{db_path.name}",statement="SELECT"'
+    assert sample(metrics, "db_queries_total", db_labels) >= 1
+
+
+def test_metric_must_implement_samples():
+    with pytest.raises(TypeError):
+        Metric("incomplete_metric", "Never registered.")
@@ -0,0 +1,41 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from src.expenses import crud
+from src.models import Expense
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "expense_id, stored_type",
+    [
+        ("12345678-1234-5678-1234-567812345678", "blob"),
+        ("legacy-id-16byte", "text"),
+        ("12345678123456781234567812345678", "text"),
+        ("ABCDEF00-1234-5678-1234-567812345678", "text"),
+    ],
+)
+async def test_expense_ids_round_trip(session_factory, expense_id, stored_type):
+    async with session_factory() as session:
+        session.add(
+            Expense(
+                id=expense_id,
+                telegram_user_id="42",
+                amount_in_uah=Decimal("1"),
+                amount_in_usd=Decimal("0.03"),
+                description="",
+                expense_date=date(2024, 1, 1),
+            )
+        )
+        await session.commit()
+
+    async with session_factory() as session:
+        expense = await crud.get_expense_by_id(session, expense_id)
+        stored = await session.scalar(text("SELECT typeof(id) FROM expenses"))
+
+    assert expense.id == expense_id
+    assert stored == stored_type
@@ -0,0 +1,216 @@
+import sqlite3
+from datetime import date
+from typing import Awaitable, Callable, List, Tuple
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.expenses import crud
+
+pytestmark = pytest.mark.anyio
+
+USER_DATE_INDEX = "ix_expenses_telegram_user_id_expense_date_id"
+
+
+async def capture_selects(
+    session_factory: async_sessionmaker[AsyncSession],
+    statements: List[Tuple[str, tuple]],
+    read: Callable[[AsyncSession], Awaitable],
+) -> List[Tuple[str, tuple]]:
+    """Run a CRUD read and return the SELECT statements it executed."""
+    async with session_factory() as session:
+        await read(session)
+    return [
+        (statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().upper().startswith("SELECT")
+    ]
+
+
+async def drain(iterator) -> None:
+    async for _ in iterator:
+        pass
+
+
+def query_plan(db_path, statement: str, parameters: tuple) -> List[str]:
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in rows]
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        pytest.param(
+            lambda session: crud.get_all_user_expenses(session, "42"),
+            id="get_all_user_expenses",
+        ),
+        pytest.param(
+            lambda session: crud.get_all_user_expenses_on_date_range(session, "42"),
+            id="date_range_unbounded",
+        ),
+        pytest.param(
+            lambda session: crud.get_all_user_expenses_on_date_range(
+                session, "42", start_date="2024-01-01"
+            ),
+            id="date_range_start",
+        ),
+        pytest.param(
+            lambda session: crud.get_all_user_expenses_on_date_range(
+                session, "42", end_date="2024-12-31"
+            ),
+            id="date_range_end",
+        ),
+        pytest.param(
+            lambda session: crud.get_all_user_expenses_on_date_range(
+                session, "42", start_date="2024-01-01", end_date="2024-12-31"
+            ),
+            id="date_range_bounded",
+        ),
+        pytest.param(
+            lambda session: crud.get_user_expenses_page(session, "42", 100),
+            id="page_first",
+        ),
+        pytest.param(
+            lambda session: crud.get_user_expenses_page(
+                session, "42", 100, after=(date(2024, 1, 1), "some-id")
+            ),
+            id="page_after_cursor",
+        ),
+        pytest.param(
+            lambda session: crud.get_user_expense_rows_page(
+                session, "42", 100, after=(date(2024, 1, 1), "some-id")
+            ),
+            id="row_page_after_cursor",
+        ),
+        pytest.param(
+            lambda session: drain(
+                crud.stream_user_expenses_on_date_range(
+                    session, "42", start_date="2024-01-01"
+                )
+            ),
+            id="export_stream",
+        ),
+        pytest.param(
+            lambda session: crud.get_user_expenses_summary(
+                session, "42", group_by="week", start_date="2024-01-01"
+            ),
+            id="summary",
+        ),
+    ],
+)
+async def test_user_reads_use_user_date_index(
+    session_factory, statements, db_path, read
+):
+    selects = await capture_selects(session_factory, statements, read)
+
+    assert selects
+    for statement, parameters in selects:
+        plan = query_plan(db_path, statement, parameters)
+        assert any(f"USING INDEX {USER_DATE_INDEX}" in step for step in plan), plan
+        assert not any(step.startswith("SCAN expenses") for step in plan), plan
+
+
+async def test_range_read_seeks_on_both_index_columns(
+    session_factory, statements, db_path
+):
+    selects = await capture_selects(
+        session_factory,
+        statements,
+        lambda session: crud.get_all_user_expenses_on_date_range(
+            session, "42", start_date="2024-01-01", end_date="2024-12-31"
+        ),
+    )
+
+    [(statement, parameters)] = selects
+    plan = query_plan(db_path, statement, parameters)
+    assert any(
+        "telegram_user_id=? AND expense_date>? AND expense_date<?" in step
+        for step in plan
+    ), plan
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("after", [None, (date(2024, 1, 1), "some-id")])
+async def test_page_read_is_ordered_by_index(
+    session_factory, statements, db_path, after, descending
+):
+    selects = await capture_selects(
+        session_factory,
+        statements,
+        lambda session: crud.get_user_expenses_page(
+            session,
+            "42",
+            100,
+            after=after,
+            start_date="2024-01-01",
+            descending=descending,
+        ),
+    )
+
+    [(statement, parameters)] = selects
+    plan = query_plan(db_path, statement, parameters)
+    assert any(f"USING INDEX {USER_DATE_INDEX}" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.parametrize("telegram_user_id", [None, "42"])
+async def test_get_expense_by_id_uses_primary_key(
+    session_factory, statements, db_path, telegram_user_id
+):
+    selects = await capture_selects(
+        session_factory,
+        statements,
+        lambda session: crud.get_expense_by_id(session, "some-id", telegram_user_id),
+    )
+
+    for statement, parameters in selects:
+        plan = query_plan(db_path, statement, parameters)
+        assert any(
+            "USING INDEX sqlite_autoindex_expenses_1" in step for step in plan
+        ), plan
+
+
+async def test_expenses_version_lookup_uses_primary_key(
+    session_factory, statements, db_path
+):
+    selects = await capture_selects(
+        session_factory,
+        statements,
+        lambda session: crud.get_expenses_version(session, "42"),
+    )
+
+    [(statement, parameters)] = selects
+    plan = query_plan(db_path, statement, parameters)
+    assert any(
+        "USING INDEX sqlite_autoindex_expense_versions_1" in step for step in plan
+    ), plan
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        pytest.param(
+            lambda session: crud.get_exchange_rate_on_date(session, date(2024, 1, 1)),
+            id="single_date",
+        ),
+        pytest.param(
+            lambda session: crud.get_exchange_rates_on_dates(
+                session, [date(2024, 1, 1), date(2024, 3, 1)]
+            ),
+            id="many_dates",
+        ),
+    ],
+)
+async def test_exchange_rate_lookup_uses_primary_key(
+    session_factory, statements, db_path, read
+):
+    selects = await capture_selects(session_factory, statements, read)
+
+    for statement, parameters in selects:
+        plan = query_plan(db_path, statement, parameters)
+        assert any(
+            "USING PRIMARY KEY" in step or "sqlite_autoindex_exchange_rates_1" in step
+            for step in plan
+        ), plan
+        assert not any("TEMP B-TREE" in step for step in plan), plan
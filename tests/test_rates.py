@@ -0,0 +1,208 @@
+import asyncio
+import threading
+from typing import Dict, List
+
+from src.expenses.rates import ExchangeRateProvider
+
+TTL = 100
+REFRESH_AHEAD = 10
+RETRY_INTERVAL = 30
+FALLBACK_RATE = 42.0
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Fetcher:
+    """Returns the queued results in order, counting the calls."""
+
+    def __init__(self, *results: Dict) -> None:
+        self.results = list(results)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self) -> Dict:
+        self.calls += 1
+        self.release.wait(1)
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+def rate(value: float) -> Dict:
+    return {"error": None, "result": value}
+
+
+FAILURE = {"error": "upstream is down", "result": None}
+
+
+def make_provider(fetcher: Fetcher, clock: Clock) -> ExchangeRateProvider:
+    return ExchangeRateProvider(
+        fetcher=fetcher,
+        ttl=TTL,
+        refresh_ahead=REFRESH_AHEAD,
+        retry_interval=RETRY_INTERVAL,
+        fallback_rate=FALLBACK_RATE,
+        clock=clock,
+    )
+
+
+async def settle(provider: ExchangeRateProvider) -> None:
+    """Let a refresh scheduled by get_rate finish."""
+    if provider._refresh_task:
+        await provider._refresh_task
+
+
+def test_cold_cache_serves_fallback_and_schedules_refresh():
+    clock, fetcher = Clock(), Fetcher(rate(40.0))
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> List[float]:
+        first = await provider.get_rate()
+        await settle(provider)
+        return [first, await provider.get_rate()]
+
+    assert asyncio.run(run()) == [FALLBACK_RATE, 40.0]
+    assert fetcher.calls == 1
+
+
+def test_rate_is_cached_for_ttl_and_refreshed_ahead_of_expiry():
+    clock, fetcher = Clock(), Fetcher(rate(40.0), rate(41.0))
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> List[float]:
+        await provider.refresh()
+        rates = []
+
+        clock.now += TTL - REFRESH_AHEAD - 1
+        rates.append(await provider.get_rate())
+        await settle(provider)
+        assert fetcher.calls == 1
+
+        # Inside the refresh-ahead window: the cached rate is still served
+        # while the new one is fetched in the background.
+        clock.now += 2
+        rates.append(await provider.get_rate())
+        await settle(provider)
+        assert fetcher.calls == 2
+
+        rates.append(await provider.get_rate())
+        return rates
+
+    assert asyncio.run(run()) == [40.0, 40.0, 41.0]
+
+
+def test_stale_rate_is_served_when_refresh_fails():
+    clock, fetcher = Clock(), Fetcher(rate(40.0), FAILURE)
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> float:
+        await provider.refresh()
+        clock.now += TTL * 2
+        assert provider.is_stale
+        result = await provider.get_rate()
+        await settle(provider)
+        return result
+
+    assert asyncio.run(run()) == 40.0
+    assert fetcher.calls == 2
+
+
+def test_concurrent_refreshes_share_one_fetch():
+    clock, fetcher = Clock(), Fetcher(rate(40.0))
+    fetcher.release.clear()
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> List:
+        refreshes = [asyncio.create_task(provider.refresh()) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        for _ in range(5):
+            assert await provider.get_rate() == FALLBACK_RATE
+        fetcher.release.set()
+        return await asyncio.gather(*refreshes)
+
+    assert asyncio.run(run()) == [40.0] * 5
+    assert fetcher.calls == 1
+
+
+def test_failed_fetch_is_retried_after_retry_interval():
+    clock, fetcher = Clock(), Fetcher(FAILURE, FAILURE, rate(40.0))
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> List[float]:
+        rates = [await provider.get_rate()]
+        await settle(provider)
+
+        clock.now += RETRY_INTERVAL - 1
+        rates.append(await provider.get_rate())
+        await settle(provider)
+        assert fetcher.calls == 1
+
+        clock.now += 1
+        rates.append(await provider.get_rate())
+        await settle(provider)
+        assert fetcher.calls == 2
+
+        clock.now += RETRY_INTERVAL
+        await provider.get_rate()
+        await settle(provider)
+        rates.append(await provider.get_rate())
+        return rates
+
+    assert asyncio.run(run()) == [FALLBACK_RATE, FALLBACK_RATE, FALLBACK_RATE, 40.0]
+    assert fetcher.calls == 3
+
+
+def test_api_startup_waits_for_first_rate(monkeypatch):
+    from src.api import app, lifespan
+    from src.expenses.rates import usd_to_uah_provider
+
+    monkeypatch.setattr(usd_to_uah_provider, "_fetcher", Fetcher(rate(40.0)))
+    monkeypatch.setattr(usd_to_uah_provider, "_rate", None)
+    monkeypatch.setattr(usd_to_uah_provider, "_last_attempt_at", None)
+
+    async def run() -> float:
+        async with lifespan(app):
+            return await usd_to_uah_provider.get_rate()
+
+    assert asyncio.run(run()) == 40.0
+
+
+def test_local_bot_startup_waits_for_first_rate(monkeypatch):
+    from src.expenses.rates import usd_to_uah_provider
+    from src.expenses.service import LocalExpensesService
+
+    monkeypatch.setattr(usd_to_uah_provider, "_fetcher", Fetcher(rate(40.0)))
+    monkeypatch.setattr(usd_to_uah_provider, "_rate", None)
+    monkeypatch.setattr(usd_to_uah_provider, "_last_attempt_at", None)
+
+    async def run() -> float:
+        service = LocalExpensesService()
+        await service.start()
+        try:
+            return await usd_to_uah_provider.get_rate()
+        finally:
+            await service.close()
+
+    assert asyncio.run(run()) == 40.0
+
+
+def test_warm_up_gives_up_after_timeout_and_keeps_refreshing():
+    clock, fetcher = Clock(), Fetcher(rate(40.0))
+    fetcher.release.clear()
+    provider = make_provider(fetcher, clock)
+
+    async def run() -> List[float]:
+        await provider.warm_up(timeout=0.01)
+        rates = [await provider.get_rate()]
+        fetcher.release.set()
+        await settle(provider)
+        rates.append(await provider.get_rate())
+        return rates
+
+    assert asyncio.run(run()) == [FALLBACK_RATE, 40.0]
+    assert fetcher.calls == 1
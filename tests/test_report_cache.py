@@ -0,0 +1,137 @@
+import os
+import time
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import FSInputFile
+
+from src.telegram.report_cache import ReportCache, file_id_path
+from src.telegram.router import get_expenses_data
+
+pytestmark = pytest.mark.anyio
+
+USER = "42"
+MAX_AGE = 60
+REPORT = b"x" * 10
+
+
+@pytest.fixture
+def cache(tmp_path) -> ReportCache:
+    return ReportCache(tmp_path, max_bytes=len(REPORT) * 2, max_age=MAX_AGE)
+
+
+async def put(cache: ReportCache, start_date: str, version: int = 1):
+    return await cache.put(USER, start_date, "2024-12-31", version, REPORT)
+
+
+async def get(cache: ReportCache, start_date: str, version: int = 1):
+    return await cache.get(USER, start_date, "2024-12-31", version)
+
+
+def last_used(path, seconds_ago: float) -> None:
+    at = time.time() - seconds_ago
+    os.utime(path, (at, at))
+
+
+async def test_file_id_of_a_sent_report_is_kept_with_it(cache):
+    assert await get(cache, "2024-01-01") is None
+
+    path = await put(cache, "2024-01-01")
+    assert await get(cache, "2024-01-01") == (path, None)
+
+    await cache.set_file_id(path, "telegram-file-id")
+    assert await get(cache, "2024-01-01") == (path, "telegram-file-id")
+
+
+async def test_newer_version_replaces_older_reports(cache):
+    old = await put(cache, "2024-01-01", version=1)
+    await cache.set_file_id(old, "old-file-id")
+
+    await put(cache, "2024-06-01", version=2)
+
+    assert not old.exists() and not file_id_path(old).exists()
+    assert await get(cache, "2024-01-01", version=1) is None
+    assert await get(cache, "2024-06-01", version=2) is not None
+
+
+async def test_report_expires_after_max_age(cache):
+    path = await put(cache, "2024-01-01")
+    last_used(path, MAX_AGE + 1)
+
+    assert await get(cache, "2024-01-01") is None
+
+
+async def test_least_recently_used_report_is_evicted_over_max_bytes(cache):
+    first = await put(cache, "2024-01-01")
+    second = await put(cache, "2024-02-01")
+    await cache.set_file_id(second, "second-file-id")
+    last_used(first, 20)
+    last_used(second, 10)
+    # Using the first report makes the second one the least recently used.
+    assert await get(cache, "2024-01-01") is not None
+
+    third = await put(cache, "2024-03-01")
+
+    assert first.exists() and third.exists()
+    assert not second.exists() and not file_id_path(second).exists()
+
+
+class FakeExpensesService:
+    def __init__(self) -> None:
+        self.version = 1
+        self.listed = 0
+
+    async def get_expenses_version(self, telegram_user_id: str) -> int:
+        return self.version
+
+    async def list_expenses(self, telegram_user_id: str, **filters) -> List[dict]:
+        self.listed += 1
+        return [{"description": "coffee", "amount_in_uah": "10.00"}]
+
+
+class FakeMessage:
+    """Records the documents answered; each upload gets a new file_id."""
+
+    def __init__(self) -> None:
+        self.text = "31.12.2024"
+        self.from_user = SimpleNamespace(id=int(USER))
+        self.documents: List = []
+
+    async def answer_document(self, document, caption: str):
+        self.documents.append(document)
+        return SimpleNamespace(
+            document=SimpleNamespace(file_id=f"file-{len(self.documents)}")
+        )
+
+    async def answer(self, text: str, **kwargs) -> None:
+        pass
+
+
+async def request_report(cache, service) -> FakeMessage:
+    message = FakeMessage()
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=1, user_id=1))
+    await state.update_data(start_date="2024-01-01")
+    await get_expenses_data(message, state, service, cache)  # type: ignore
+    return message
+
+
+async def test_repeated_report_is_resent_by_file_id(tmp_path):
+    cache = ReportCache(tmp_path, max_bytes=10**6, max_age=MAX_AGE)
+    service = FakeExpensesService()
+
+    first = await request_report(cache, service)
+    second = await request_report(cache, service)
+
+    assert isinstance(first.documents[0], FSInputFile)
+    assert second.documents == ["file-1"]
+    assert service.listed == 1
+
+    service.version = 2
+    third = await request_report(cache, service)
+
+    assert isinstance(third.documents[0], FSInputFile)
+    assert service.listed == 2
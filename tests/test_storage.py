@@ -0,0 +1,127 @@
+from typing import AsyncIterator, Callable, List
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.telegram import storage as storage_module
+from src.telegram.storage import SQLiteStorage, fsm_states
+
+pytestmark = pytest.mark.anyio
+
+TTL = 100
+PURGE_INTERVAL = 60
+
+
+class FakeTime:
+    """Stands in for the `time` module, moving wall and monotonic time together."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake_time = FakeTime()
+    monkeypatch.setattr(storage_module, "time", fake_time)
+    return fake_time
+
+
+def key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+@pytest.fixture
+async def make_storage(tmp_path) -> AsyncIterator[Callable[..., SQLiteStorage]]:
+    """Make storages sharing one FSM database; each takes its own cache TTL."""
+    storages: List[SQLiteStorage] = []
+
+    def make(cache_ttl: float = 0) -> SQLiteStorage:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'fsm.sqlite3'}")
+        storages.append(
+            SQLiteStorage(
+                engine, ttl=TTL, cache_ttl=cache_ttl, purge_interval=PURGE_INTERVAL
+            )
+        )
+        return storages[-1]
+
+    yield make
+    for storage in storages:
+        await storage.close()
+
+
+async def test_state_and_data_expire_after_ttl(make_storage, clock):
+    storage = make_storage()
+    await storage.set_state(key(1), "waiting")
+    await storage.set_data(key(1), {"amount": "10"})
+
+    clock.now += TTL - 1
+    alive = await storage.get_state(key(1)), await storage.get_data(key(1))
+    clock.now += 1
+    expired = await storage.get_state(key(1)), await storage.get_data(key(1))
+
+    assert alive == ("waiting", {"amount": "10"})
+    assert expired == (None, {})
+
+
+async def test_write_keeps_the_other_column_of_a_live_row(make_storage, clock):
+    storage = make_storage()
+    await storage.set_state(key(1), "waiting")
+    await storage.set_data(key(1), {"amount": "10"})
+    await storage.set_state(key(1), "confirming")
+    kept = await storage.get_state(key(1)), await storage.get_data(key(1))
+
+    clock.now += TTL
+    await storage.set_data(key(1), {"amount": "20"})
+    reset = await storage.get_state(key(1)), await storage.get_data(key(1))
+
+    assert kept == ("confirming", {"amount": "10"})
+    assert reset == (None, {"amount": "20"})
+
+
+async def test_purge_deletes_expired_and_empty_rows(make_storage, clock):
+    storage = make_storage()
+    await storage.set_state(key(1), "abandoned")
+    await storage.set_state(key(2), "finished")
+    await storage.set_state(key(2), None)
+
+    # Only past the purge interval does the next write purge.
+    clock.now += TTL
+    await storage.set_state(key(3), "waiting")
+
+    async with storage._engine.connect() as connection:
+        result = await connection.execute(select(fsm_states.c.key))
+        keys = list(result.scalars())
+
+    assert keys == [storage._key_builder.build(key(3))]
+
+
+async def test_uncached_storages_see_each_others_writes(make_storage, clock):
+    first, second = make_storage(), make_storage()
+
+    await first.set_state(key(1), "waiting")
+    seen = [await second.get_state(key(1))]
+    await first.set_state(key(1), "confirming")
+    seen.append(await second.get_state(key(1)))
+
+    assert seen == ["waiting", "confirming"]
+
+
+async def test_cached_entries_are_served_until_cache_ttl(make_storage, clock):
+    writer, reader = make_storage(), make_storage(cache_ttl=1)
+
+    await writer.set_state(key(1), "waiting")
+    seen = [await reader.get_state(key(1))]
+    await writer.set_state(key(1), "confirming")
+    seen.append(await reader.get_state(key(1)))
+    clock.now += 1
+    seen.append(await reader.get_state(key(1)))
+
+    assert seen == ["waiting", "waiting", "confirming"]
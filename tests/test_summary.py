@@ -0,0 +1,68 @@
+from typing import List
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+USER = "42"
+
+
+async def add_expenses(client, dates: List[str]) -> None:
+    response = await client.post(
+        "/expenses/batch",
+        json=[
+            {
+                "telegram_user_id": USER,
+                "amount_in_uah": "10",
+                "description": "coffee",
+                "expense_date": expense_date,
+            }
+            for expense_date in dates
+        ],
+    )
+    assert response.json()["created"] == len(dates)
+
+
+async def summary(client, group_by: str) -> dict:
+    response = await client.get(
+        "/expenses/summary",
+        params={"expense_telegram_user_id": USER, "group_by": group_by},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_week_spanning_new_year_is_one_bucket(client):
+    # Monday 2024-12-30 to Sunday 2025-01-05, then the next Monday
+    await add_expenses(client, ["2024-12-30", "2024-12-31", "2025-01-01"])
+    await add_expenses(client, ["2025-01-05", "2025-01-06"])
+
+    buckets = (await summary(client, "week"))["buckets"]
+
+    assert [(bucket["period"], bucket["count"]) for bucket in buckets] == [
+        ("2024-12-30", 4),
+        ("2025-01-06", 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "group_by, periods",
+    [
+        ("day", ["2024-01-31", "2024-02-01"]),
+        ("month", ["2024-01", "2024-02"]),
+    ],
+)
+async def test_day_and_month_buckets(client, group_by, periods):
+    await add_expenses(client, ["2024-01-31", "2024-02-01", "2024-02-01"])
+
+    result = await summary(client, group_by)
+
+    assert [bucket["period"] for bucket in result["buckets"]] == periods
+    assert (result["count"], result["total_uah"]) == (3, "30.00")
+
+
+async def test_empty_summary_totals_have_cents(client):
+    result = await summary(client, "month")
+
+    assert result["buckets"] == []
+    assert (result["total_uah"], result["total_usd"]) == ("0.00", "0.00")
@@ -0,0 +1,194 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+
+from src.api import app
+from src.config import get_settings
+from src.telegram.webhook import SECRET_TOKEN_HEADER, TelegramWebhook
+
+SECRET = "test-secret"
+WEBHOOK_PATH = get_settings().BOT_WEBHOOK_PATH
+
+
+def make_update(update_id: int, text: str = "hello") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+def make_webhook(router: Router, max_concurrency: int = 10) -> TelegramWebhook:
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    return TelegramWebhook(
+        dispatcher,
+        Bot("42:TEST"),
+        secret_token=SECRET,
+        max_concurrency=max_concurrency,
+    )
+
+
+async def post_updates(webhook: TelegramWebhook, *updates: dict, **headers) -> List:
+    app.state.telegram_webhook = webhook
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                *(
+                    client.post(WEBHOOK_PATH, json=update, headers=headers)
+                    for update in updates
+                )
+            )
+    finally:
+        app.state.telegram_webhook = None
+
+
+def test_update_is_fed_to_dispatcher():
+    router = Router()
+    received: List[str] = []
+    done = asyncio.Event()
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        received.append(message.text)
+        done.set()
+
+    async def run() -> None:
+        webhook = make_webhook(router)
+        [response] = await post_updates(
+            webhook, make_update(1), **{SECRET_TOKEN_HEADER: SECRET}
+        )
+        assert response.status_code == 200
+        await asyncio.wait_for(done.wait(), 1)
+
+    asyncio.run(run())
+    assert received == ["hello"]
+
+
+@pytest.mark.parametrize("headers", [{}, {SECRET_TOKEN_HEADER: "wrong"}])
+def test_update_without_valid_secret_is_rejected(headers):
+    router = Router()
+    received: List[str] = []
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        received.append(message.text)
+
+    async def run() -> None:
+        [response] = await post_updates(make_webhook(router), make_update(1), **headers)
+        assert response.status_code == 401
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert received == []
+
+
+def test_invalid_update_is_rejected():
+    async def run() -> None:
+        [response] = await post_updates(
+            make_webhook(Router()), {"message": "nope"}, **{SECRET_TOKEN_HEADER: SECRET}
+        )
+        assert response.status_code == 400
+
+    asyncio.run(run())
+
+
+def test_concurrent_updates_are_bounded():
+    router = Router()
+    release = asyncio.Event()
+    in_flight = 0
+    max_in_flight = 0
+    processed: List[int] = []
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await release.wait()
+        in_flight -= 1
+        processed.append(message.message_id)
+
+    async def run() -> None:
+        webhook = make_webhook(router, max_concurrency=2)
+        posting = asyncio.create_task(
+            post_updates(
+                webhook,
+                *(make_update(i) for i in range(1, 6)),
+                **{SECRET_TOKEN_HEADER: SECRET},
+            )
+        )
+        await asyncio.sleep(0.1)
+        # Two updates are being handled, the other requests wait for a slot.
+        assert in_flight == 2
+        assert not posting.done()
+
+        release.set()
+        responses = await asyncio.wait_for(posting, 1)
+        assert [response.status_code for response in responses] == [200] * 5
+        while len(processed) < 5:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert max_in_flight == 2
+    assert sorted(processed) == [1, 2, 3, 4, 5]
+
+
+def test_missing_url_falls_back_to_polling():
+    webhook = make_webhook(Router())
+
+    async def run() -> None:
+        calls = []
+
+        async def fake_polling(bot, **kwargs):
+            calls.append(bot)
+            await asyncio.Event().wait()
+
+        async def fake_delete_webhook(*args, **kwargs):
+            return True
+
+        webhook.dispatcher.start_polling = fake_polling
+        webhook.bot.delete_webhook = fake_delete_webhook
+
+        await webhook.start()
+        await asyncio.sleep(0)
+        assert webhook.polling
+        assert calls == [webhook.bot]
+        await webhook.close()
+        assert not webhook.polling
+
+    asyncio.run(run())
+
+
+def test_webhook_requires_secret():
+    with pytest.raises(ValueError):
+        TelegramWebhook(Dispatcher(), Bot("42:TEST"), secret_token="")
+
+
+def test_polling_entry_point_keeps_the_webhook_in_webhook_mode(monkeypatch):
+    from src import bot
+
+    calls: List[str] = []
+
+    class FakeBot:
+        async def delete_webhook(self) -> None:
+            calls.append("delete_webhook")
+
+    monkeypatch.setattr(bot.settings, "BOT_MODE", "webhook")
+    monkeypatch.setattr(bot, "create_bot", FakeBot)
+
+    with pytest.raises(SystemExit):
+        asyncio.run(bot.main())
+    assert calls == []
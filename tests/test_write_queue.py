@@ -0,0 +1,111 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, List
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.expenses import crud
+from src.expenses.write_queue import WriteCoalescer
+from src.models import Expense
+
+pytestmark = pytest.mark.anyio
+
+RATE = Decimal("40")
+
+
+@pytest.fixture
+async def coalescer(session_factory) -> AsyncIterator[WriteCoalescer]:
+    coalescer = WriteCoalescer(session_factory, window=0.05, max_batch=10)
+    await coalescer.start()
+    yield coalescer
+    await coalescer.close()
+
+
+def create(description: str) -> Callable[[AsyncSession], Awaitable[Expense]]:
+    return lambda session: crud.create_expense(
+        session,
+        telegram_user_id="42",
+        amount_in_uah=Decimal("10"),
+        description=description,
+        date=date(2024, 1, 1),
+        fallback_rate=RATE,
+        commit=False,
+    )
+
+
+def update(expense_id: str, amount: str, description: str):
+    return lambda session: crud.update_expense(
+        session,
+        expense_id,
+        telegram_user_id="42",
+        fallback_rate=RATE,
+        commit=False,
+        amount_in_uah=Decimal(amount),
+        description=description,
+    )
+
+
+async def stored_descriptions(session_factory: async_sessionmaker) -> List[str]:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Expense.description).order_by(Expense.description)
+        )
+        return list(result.scalars())
+
+
+async def test_coalesced_updates_of_one_row_return_fresh_values(
+    coalescer, session_factory
+):
+    expense = await coalescer.submit(create("initial"))
+    first, second = await asyncio.gather(
+        coalescer.submit(update(expense.id, "20", "first")),
+        coalescer.submit(update(expense.id, "30", "second")),
+    )
+
+    async with session_factory() as session:
+        stored = await crud.get_expense_by_id(session, expense.id)
+
+    assert first is not second
+    assert (first.description, first.amount_in_uah) == ("first", Decimal("20"))
+    assert first.amount_in_usd == Decimal("0.50")
+    assert (second.description, second.amount_in_uah) == ("second", Decimal("30"))
+    assert second.amount_in_usd == Decimal("0.75")
+    assert (stored.description, stored.amount_in_uah) == ("second", Decimal("30"))
+
+
+async def test_failing_operation_only_fails_its_own_caller(coalescer, session_factory):
+    async def fail(session: AsyncSession):
+        await create("rolled back")(session)
+        raise ValueError("bad write")
+
+    first, failure, last = await asyncio.gather(
+        coalescer.submit(create("a")),
+        coalescer.submit(fail),
+        coalescer.submit(create("b")),
+        return_exceptions=True,
+    )
+
+    assert isinstance(failure, ValueError)
+    assert (first.description, last.description) == ("a", "b")
+    assert await stored_descriptions(session_factory) == ["a", "b"]
+
+
+async def test_close_drains_queued_operations(coalescer, session_factory):
+    submitted = [
+        asyncio.create_task(coalescer.submit(create(str(i)))) for i in range(5)
+    ]
+    await asyncio.sleep(0)
+    await coalescer.close()
+
+    assert all(task.done() for task in submitted)
+    assert await stored_descriptions(session_factory) == list("01234")
+
+
+async def test_submit_after_close_restarts_the_worker(coalescer, session_factory):
+    await coalescer.close()
+    await coalescer.submit(create("after close"))
+
+    assert await stored_descriptions(session_factory) == ["after close"]